@@ -39,7 +39,24 @@ else:
 EOF
 
 
-python manage.py rqworker default &
+# Start RQ_WORKERS_<QUEUE> workers per queue, so heavy transcodes and light
+# jobs (thumbnails, emails, cleanup) are served by separate worker pools.
+# Extra queue names are listened to with lower priority.
+start_workers() {
+  count=$1
+  shift
+  i=0
+  while [ "$i" -lt "$count" ]; do
+    python manage.py rqworker "$@" --with-scheduler &
+    i=$((i + 1))
+  done
+}
+
+start_workers "${RQ_WORKERS_TRANSCODE:-1}" transcode
+start_workers "${RQ_WORKERS_MEDIA_LIGHT:-1}" media-light
+start_workers "${RQ_WORKERS_EMAIL:-1}" email
+# the maintenance pool also drains jobs left on the old default queue
+start_workers "${RQ_WORKERS_MAINTENANCE:-1}" maintenance default
 
 # depending on the environment, start the server in development or production mode
 if [ "$DJANGO_ENV" = "development" ]; then
@@ -137,16 +137,121 @@ CACHES = {
     }
 }
 
+RQ_CONNECTION = {
+    'HOST': os.environ.get("REDIS_HOST", default="redis"),
+    'PORT': os.environ.get("REDIS_PORT", default=6379),
+    'DB': os.environ.get("REDIS_DB", default=0),
+    'REDIS_CLIENT_KWARGS': {},
+}
+
+# Heavy and light jobs run on separate queues served by their own workers
+# (see backend.entrypoint.sh), so a long transcode never delays an email.
+# "transcode": ffmpeg encodes, "media-light": probing, thumbnails and
+# playlist finalizing, "email": user emails, "maintenance": S3 cleanup.
+# "default" is kept so jobs enqueued before the split still get processed.
 RQ_QUEUES = {
-    'default': {
-        'HOST': os.environ.get("REDIS_HOST", default="redis"),
-        'PORT': os.environ.get("REDIS_PORT", default=6379),
-        'DB': os.environ.get("REDIS_DB", default=0),
-        'DEFAULT_TIMEOUT': 900,
-        'REDIS_CLIENT_KWARGS': {},
-    },
+    'default': {**RQ_CONNECTION, 'DEFAULT_TIMEOUT': 900},
+    'transcode': {**RQ_CONNECTION, 'DEFAULT_TIMEOUT': int(os.environ.get(
+        "RQ_TRANSCODE_TIMEOUT", default=7200))},
+    'media-light': {**RQ_CONNECTION, 'DEFAULT_TIMEOUT': int(os.environ.get(
+        "RQ_MEDIA_LIGHT_TIMEOUT", default=900))},
+    'email': {**RQ_CONNECTION, 'DEFAULT_TIMEOUT': int(os.environ.get(
+        "RQ_EMAIL_TIMEOUT", default=120))},
+    'maintenance': {**RQ_CONNECTION, 'DEFAULT_TIMEOUT': int(os.environ.get(
+        "RQ_MAINTENANCE_TIMEOUT", default=1800))},
 }
 
+# "single_pass" decodes the source once and encodes all HLS heights in one
+# ffmpeg process, "sequential" runs one ffmpeg process per height and
+# "parallel" enqueues one RQ job per height plus a finalize job, "chunked"
+# splits the source at keyframes into HLS_CHUNK_SECONDS ranges encoded as
+# separate jobs and stitched into continuous playlists.
+HLS_TRANSCODE_MODE = os.environ.get("HLS_TRANSCODE_MODE", default="single_pass")
+HLS_RENDITION_TIMEOUT = int(os.environ.get(
+    "HLS_RENDITION_TIMEOUT", default=3600))
+HLS_CHUNK_SECONDS = int(os.environ.get("HLS_CHUNK_SECONDS", default=120))
+# Worker-local disk cache for source videos, shared by all pipeline stages.
+VIDEO_SOURCE_CACHE_DIR = os.environ.get(
+    "VIDEO_SOURCE_CACHE_DIR", default="/tmp/videoflix_source_cache")
+VIDEO_SOURCE_CACHE_MAX_BYTES = int(os.environ.get(
+    "VIDEO_SOURCE_CACHE_MAX_BYTES", default=20 * 1024 ** 3))
+# "download" reads sources through the local cache, "presigned" lets ffmpeg
+# read them from a short-lived presigned URL with HTTP range requests.
+VIDEO_SOURCE_INPUT = os.environ.get("VIDEO_SOURCE_INPUT", default="download")
+VIDEO_SOURCE_URL_EXPIRATION = int(os.environ.get(
+    "VIDEO_SOURCE_URL_EXPIRATION", default=7200))
+# Hash every upload (SHA-256) and let re-uploads of an already processed
+# file share its HLS, thumbnails and metadata instead of transcoding again.
+VIDEO_DEDUPLICATION = os.getenv(
+    "VIDEO_DEDUPLICATION", "True").lower() in ("true", "1", "yes")
+# Host-wide admission control for ffmpeg encodes: each encode holds one of
+# TRANSCODE_SLOTS slots (default: cores // TRANSCODE_THREADS_PER_SLOT) and
+# uses that many threads, so concurrent workers do not oversubscribe the
+# CPU. TRANSCODE_CPU_CORES=0 uses the cores available to the process.
+TRANSCODE_CPU_CORES = int(os.environ.get("TRANSCODE_CPU_CORES", default=0))
+TRANSCODE_THREADS_PER_SLOT = int(os.environ.get(
+    "TRANSCODE_THREADS_PER_SLOT", default=4))
+TRANSCODE_SLOTS = int(os.environ.get("TRANSCODE_SLOTS", default=0))
+TRANSCODE_SLOT_DIR = os.environ.get(
+    "TRANSCODE_SLOT_DIR", default="/tmp/videoflix_transcode_slots")
+# x264 preset of all renditions (speed vs. size at the same quality).
+TRANSCODE_PRESET = os.environ.get("TRANSCODE_PRESET", default="medium")
+# Client object used instead of boto3 for all S3 calls (None uses boto3);
+# set by benchmark_transcode to run against the local filesystem.
+S3_CLIENT = None
+# Concurrent S3 uploads per job and retries per file.
+S3_UPLOAD_WORKERS = int(os.environ.get("S3_UPLOAD_WORKERS", default=16))
+S3_UPLOAD_RETRIES = int(os.environ.get("S3_UPLOAD_RETRIES", default=3))
+# Concurrent DeleteObjects batches (1000 keys each) and retries per batch
+# and per failed deletion job.
+S3_DELETE_WORKERS = int(os.environ.get("S3_DELETE_WORKERS", default=4))
+S3_DELETE_RETRIES = int(os.environ.get("S3_DELETE_RETRIES", default=3))
+# Hand out the same presigned URL per key for this many seconds (0 disables).
+PRESIGNED_URL_CACHE_WINDOW = int(os.environ.get(
+    "PRESIGNED_URL_CACHE_WINDOW", default=3600))
+# Upload finished HLS segments while ffmpeg is still encoding.
+HLS_STREAM_UPLOADS = os.getenv(
+    "HLS_STREAM_UPLOADS", "True").lower() in ("true", "1", "yes")
+# Encode a short sample first and scale the ladder bitrates to its complexity.
+HLS_COMPLEXITY_ANALYSIS = os.getenv(
+    "HLS_COMPLEXITY_ANALYSIS", "False").lower() in ("true", "1", "yes")
+# HLS segment packaging: "mpegts" (.ts) or "fmp4" (CMAF .m4s, also served as DASH).
+HLS_SEGMENT_FORMAT = os.environ.get("HLS_SEGMENT_FORMAT", default="mpegts")
+# Store one media file per rendition and address segments with EXT-X-BYTERANGE.
+HLS_SINGLE_FILE = os.getenv(
+    "HLS_SINGLE_FILE", "False").lower() in ("true", "1", "yes")
+# Encode audio once into a rendition shared by all variants (EXT-X-MEDIA group).
+HLS_SHARED_AUDIO = os.getenv(
+    "HLS_SHARED_AUDIO", "True").lower() in ("true", "1", "yes")
+# Retries of failed transcode jobs. Finished renditions and chunks are
+# checkpointed in the cache for HLS_CHECKPOINT_TTL seconds and skipped on retry.
+HLS_JOB_RETRIES = int(os.environ.get("HLS_JOB_RETRIES", default=3))
+HLS_CHECKPOINT_TTL = int(os.environ.get("HLS_CHECKPOINT_TTL", default=604800))
+# Seconds between progress updates (percent, fps, ETA) that ffmpeg runs
+# write to the cache for GET /api/video/<id>/progress/.
+HLS_PROGRESS_INTERVAL = float(os.environ.get(
+    "HLS_PROGRESS_INTERVAL", default=2))
+# Publish the first rendition (highest height not above
+# HLS_FIRST_RENDITION_HEIGHT) as soon as it is encoded and grow the master
+# playlist as the other renditions finish.
+HLS_PROGRESSIVE = os.getenv(
+    "HLS_PROGRESSIVE", "True").lower() in ("true", "1", "yes")
+HLS_FIRST_RENDITION_HEIGHT = int(os.environ.get(
+    "HLS_FIRST_RENDITION_HEIGHT", default=360))
+# Store HLS playlists unsigned and sign them per request at the playlist
+# endpoint. Rendered playlists are cached per HLS_PLAYLIST_SIGNING_WINDOW
+# seconds and their URLs stay valid for at least one more window.
+HLS_REQUEST_TIME_SIGNING = os.getenv(
+    "HLS_REQUEST_TIME_SIGNING", "True").lower() in ("true", "1", "yes")
+HLS_PLAYLIST_SIGNING_WINDOW = int(os.environ.get(
+    "HLS_PLAYLIST_SIGNING_WINDOW", default=14400))
+# Generate trickplay sprite sheets and a WebVTT track for scrubbing previews.
+HLS_TRICKPLAY = os.getenv(
+    "HLS_TRICKPLAY", "True").lower() in ("true", "1", "yes")
+# Widths of the responsive WebP/JPEG thumbnail variants.
+THUMBNAIL_WIDTHS = [int(w) for w in os.environ.get(
+    "THUMBNAIL_WIDTHS", default="320,640,1280").split(",")]
+
 STORAGES = {
     "default": {
         "BACKEND": "storages.backends.s3boto3.S3Boto3Storage",
@@ -19,7 +19,7 @@ def send_email_on_user_create(sender, instance, created, **kwargs):
 
     update_fields = kwargs.get("update_fields")
     if created or (update_fields and "password" in update_fields):
-        queue = django_rq.get_queue("default")
+        queue = django_rq.get_queue("email")
         queue.enqueue(send_verification_email_task, instance.pk)
 
 
@@ -34,7 +34,7 @@ def send_email_on_user_verified(sender, instance, created, **kwargs):
 
     update_fields = kwargs.get("update_fields")
     if update_fields and "is_verified" in update_fields and instance.is_verified:
-        queue = django_rq.get_queue("default")
+        queue = django_rq.get_queue("email")
         queue.enqueue(send_register_success_email_task, instance.pk)
 
 
@@ -2,6 +2,7 @@ import uuid
 from django.core.mail import get_connection, EmailMultiAlternatives
 from django.template.loader import render_to_string
 from django.conf import settings
+from django_rq import job
 from users_auth_app.models import CustomUser
 
 
@@ -79,6 +80,7 @@ def send_email(user_email: str, html_content: str, connection, subject: str) ->
         print(f"[ERROR] Email send error for user {user_email}: {e}")
 
 
+@job('email')
 def send_verification_email_task(user_id: int) -> None:
     """Main task: orchestrates sending the verification email to the user."""
     user = get_user_by_id(user_id)
@@ -105,6 +107,7 @@ def render_register_success_email_html(reset_link: str) -> str:
     return html
 
 
+@job('email')
 def send_register_success_email_task(user_id: int) -> None:
     """
     Sends a success email to the user if the account has been verified.
@@ -30,6 +30,7 @@ def test_signal_enqueue_on_create_unverified(mocker):
     mock_queue = mocker.patch("django_rq.get_queue")
     queue = mock_queue.return_value
     send_email_on_user_create(CustomUser, user, True)
+    mock_queue.assert_called_once_with("email")
     queue.enqueue.assert_called_once_with(
         send_verification_email_task, user.pk)
 
@@ -2,6 +2,7 @@ from django.contrib import admin
 from import_export import resources
 from import_export.admin import ImportExportModelAdmin
 
+from .api.signals import batch_video_deletions
 from .models import UserWatchHistory, Video
 
 
@@ -32,6 +33,11 @@ class VideoAdmin(ImportExportModelAdmin):
     resource_classes = [Video]
     list_display = [field.name for field in Video._meta.fields]
 
+    def delete_queryset(self, request, queryset):
+        """Delete the selected videos and remove their S3 assets in one job."""
+        with batch_video_deletions():
+            super().delete_queryset(request, queryset)
+
 
 @admin.register(UserWatchHistory)
 class UserWatchHistoryAdmin(ImportExportModelAdmin):
@@ -0,0 +1,67 @@
+import fcntl
+import os
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+
+SLOT_POLL_SECONDS = 1.0
+
+
+def get_host_cores():
+    """Return the cores transcodes may use (TRANSCODE_CPU_CORES or the CPU affinity)."""
+    if settings.TRANSCODE_CPU_CORES:
+        return settings.TRANSCODE_CPU_CORES
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def get_thread_budget():
+    """Return the threads one ffmpeg encode may use."""
+    return max(1, min(settings.TRANSCODE_THREADS_PER_SLOT, get_host_cores()))
+
+
+def get_slot_count():
+    """
+    Return how many ffmpeg encodes may run at once on this host, so their
+    thread budgets add up to the cores (TRANSCODE_SLOTS overrides).
+    """
+    if settings.TRANSCODE_SLOTS:
+        return settings.TRANSCODE_SLOTS
+    return max(1, get_host_cores() // get_thread_budget())
+
+
+def try_acquire(slot_dir, count):
+    """Lock the first free slot file and return it, or None if all are busy."""
+    for index in range(count):
+        lock_file = open(os.path.join(slot_dir, f"slot{index}.lock"), "a")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return lock_file
+        except BlockingIOError:
+            lock_file.close()
+    return None
+
+
+@contextmanager
+def slot():
+    """
+    Hold one of the host's transcode slots while an ffmpeg encode runs and
+    wait while all of them are busy. Slots are file locks shared by all
+    workers on the host; the kernel releases them if a worker dies.
+    """
+    slot_dir = settings.TRANSCODE_SLOT_DIR
+    os.makedirs(slot_dir, exist_ok=True)
+    count = get_slot_count()
+    lock_file = try_acquire(slot_dir, count)
+    if lock_file is None:
+        print(f"All {count} transcode slots are busy, waiting")
+    while lock_file is None:
+        time.sleep(SLOT_POLL_SECONDS)
+        lock_file = try_acquire(slot_dir, count)
+    try:
+        yield
+    finally:
+        fcntl.flock(lock_file, fcntl.LOCK_UN)
+        lock_file.close()
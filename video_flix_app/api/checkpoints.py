@@ -0,0 +1,65 @@
+import time
+import uuid
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import cache
+
+KEY_PREFIX = "transcode_checkpoint"
+LOCK_PREFIX = "transcode_lock"
+PUBLISHED_PREFIX = "transcode_published"
+LOCK_POLL_SECONDS = 0.1
+
+
+def get_checkpoint_key(base_name, step):
+    """Return the cache key of one transcode step ('720p', 'audio', 'chunk3', ...)."""
+    return f"{KEY_PREFIX}:{base_name}:{step}"
+
+
+def is_done(base_name, step):
+    """Return True if the step finished and its artifacts are in S3."""
+    return cache.get(get_checkpoint_key(base_name, step)) is not None
+
+
+def mark_done(base_name, step):
+    """Record that a step finished. Call only after its upload succeeded."""
+    cache.set(get_checkpoint_key(base_name, step), True,
+              timeout=settings.HLS_CHECKPOINT_TTL)
+
+
+def clear(base_name, steps):
+    """Forget the checkpoints of a finished transcode."""
+    cache.delete_many([get_checkpoint_key(base_name, step) for step in steps])
+
+
+def get_published(base_name):
+    """Return the renditions of the master playlist published last."""
+    return cache.get(f"{PUBLISHED_PREFIX}:{base_name}") or []
+
+
+def set_published(base_name, renditions):
+    """Record the renditions of a published master playlist."""
+    cache.set(f"{PUBLISHED_PREFIX}:{base_name}", sorted(renditions),
+              timeout=settings.HLS_CHECKPOINT_TTL)
+
+
+def clear_published(base_name):
+    """Forget the published renditions of a finished transcode."""
+    cache.delete(f"{PUBLISHED_PREFIX}:{base_name}")
+
+
+@contextmanager
+def lock(base_name, timeout=60):
+    """
+    Hold a cache-based lock per video across workers, e.g. while the master
+    playlist is rewritten. The lock expires after timeout seconds in case
+    its holder dies.
+    """
+    key, token = f"{LOCK_PREFIX}:{base_name}", uuid.uuid4().hex
+    while not cache.add(key, token, timeout=timeout):
+        time.sleep(LOCK_POLL_SECONDS)
+    try:
+        yield
+    finally:
+        if cache.get(key) == token:
+            cache.delete(key)
@@ -0,0 +1,172 @@
+import xml.etree.ElementTree as ET
+
+MPD_NAMESPACE = "urn:mpeg:dash:schema:mpd:2011"
+MPD_PROFILE = "urn:mpeg:dash:profile:isoff-main:2011"
+TIMESCALE = 1000
+AAC_LC_CODEC = "mp4a.40.2"
+
+
+def parse_byterange(value, default_offset=0):
+    """
+    Return (length, offset) of an HLS byte range 'length[@offset]'.
+    Without an offset the range continues at default_offset.
+    """
+    length, _, offset = value.partition("@")
+    return int(length), int(offset) if offset else default_offset
+
+
+def parse_media_playlist(path):
+    """
+    Parse an fMP4 HLS media playlist into runs of segments sharing one
+    init segment: {"init": uri, "init_range": range or None,
+    "segments": [(duration, uri, range or None), ...]}, where range is
+    (length, offset) for single-file renditions. Stitched playlists carry
+    one EXT-X-MAP per chunk, hence several runs. MPEG-TS playlists give a
+    single run with init None.
+    """
+    with open(path, "r") as f:
+        lines = f.read().splitlines()
+    runs, duration, byterange, next_offset = [], None, None, 0
+    for line in lines:
+        if line.startswith("#EXT-X-MAP:"):
+            uri = line.split('URI="', 1)[1].split('"', 1)[0]
+            init_range = None
+            if 'BYTERANGE="' in line:
+                init_range = parse_byterange(
+                    line.split('BYTERANGE="', 1)[1].split('"', 1)[0])
+            runs.append({"init": uri, "init_range": init_range,
+                         "segments": []})
+        elif line.startswith("#EXTINF:"):
+            duration = float(line[len("#EXTINF:"):].split(",")[0])
+        elif line.startswith("#EXT-X-BYTERANGE:"):
+            byterange = parse_byterange(
+                line[len("#EXT-X-BYTERANGE:"):], next_offset)
+            next_offset = sum(byterange)
+        elif line and not line.startswith("#") and duration is not None:
+            if not runs:
+                runs.append({"init": None, "init_range": None,
+                             "segments": []})
+            runs[-1]["segments"].append((duration, line, byterange))
+            duration, byterange = None, None
+    return runs
+
+
+def format_range(byterange):
+    """Return a (length, offset) byte range as a DASH 'first-last' range."""
+    length, offset = byterange
+    return f"{offset}-{offset + length - 1}"
+
+
+def get_avc_codec(profile):
+    """
+    Return the RFC 6381 codec (avc1.PPCCLL) of the profile, constraint
+    flags and level bytes, as stored in an SPS and in the avcC box.
+    """
+    return f"avc1.{bytes(profile).hex()}"
+
+
+def get_fmp4_codecs(data):
+    """
+    Return the RFC 6381 codecs of fMP4 init bytes, read from the avcC box
+    and the mp4a sample entry.
+    """
+    codecs = []
+    index = data.find(b"avcC")
+    if index != -1:
+        codecs.append(get_avc_codec(data[index + 5:index + 8]))
+    if b"mp4a" in data:
+        codecs.append(AAC_LC_CODEC)
+    return codecs
+
+
+def get_init_codecs(init_path, init_range=None):
+    """
+    Return the RFC 6381 codecs string of an fMP4 init segment.
+    init_range limits the read to the init bytes of a single-file rendition.
+    """
+    with open(init_path, "rb") as f:
+        if init_range:
+            length, offset = init_range
+            f.seek(offset)
+            data = f.read(length)
+        else:
+            data = f.read()
+    return ",".join(get_fmp4_codecs(data))
+
+
+def format_duration(seconds):
+    """Return seconds as an ISO 8601 duration (PT..S)."""
+    return f"PT{seconds:.3f}S"
+
+
+def build_mpd(representations):
+    """
+    Build a static DASH manifest over already packaged fMP4 segments.
+    representations is a list of dicts with id, mime_type, bandwidth,
+    codecs, height (video only) and the runs of parse_media_playlist.
+    Representations are grouped into one adaptation set per mime type.
+    Each run becomes one Period, so all representations must share the
+    same run boundaries.
+    """
+    mime_types = list(dict.fromkeys(rep["mime_type"] for rep in representations))
+    run_durations = [sum(d for d, _, _ in run["segments"])
+                     for run in representations[0]["runs"]]
+    mpd = ET.Element("MPD", {
+        "xmlns": MPD_NAMESPACE,
+        "profiles": MPD_PROFILE,
+        "type": "static",
+        "minBufferTime": format_duration(
+            max(d for rep in representations for run in rep["runs"]
+                for d, _, _ in run["segments"])),
+        "mediaPresentationDuration": format_duration(sum(run_durations)),
+    })
+    start = 0.0
+    for index, run_duration in enumerate(run_durations):
+        period = ET.SubElement(mpd, "Period", {
+            "id": str(index),
+            "start": format_duration(start),
+            "duration": format_duration(run_duration),
+        })
+        for mime_type in mime_types:
+            adaptation = ET.SubElement(period, "AdaptationSet", {
+                "mimeType": mime_type,
+                "segmentAlignment": "true",
+                "startWithSAP": "1",
+            })
+            for rep in representations:
+                if rep["mime_type"] == mime_type:
+                    append_representation(
+                        adaptation, rep, rep["runs"][index], start)
+        start += run_duration
+    return ET.tostring(mpd, encoding="unicode", xml_declaration=True)
+
+
+def append_representation(adaptation, rep, run, start):
+    """Add one Representation with an explicit SegmentList for a run."""
+    attributes = {
+        "id": rep["id"],
+        "bandwidth": str(rep["bandwidth"]),
+        "codecs": rep["codecs"],
+    }
+    if rep.get("height"):
+        attributes["height"] = str(rep["height"])
+    representation = ET.SubElement(adaptation, "Representation", attributes)
+    segment_list = ET.SubElement(representation, "SegmentList", {
+        "timescale": str(TIMESCALE),
+        "presentationTimeOffset": str(round(start * TIMESCALE)),
+    })
+    initialization = {"sourceURL": run["init"]}
+    if run["init_range"]:
+        initialization["range"] = format_range(run["init_range"])
+    ET.SubElement(segment_list, "Initialization", initialization)
+    timeline = ET.SubElement(segment_list, "SegmentTimeline")
+    t = round(start * TIMESCALE)
+    for duration, _, _ in run["segments"]:
+        d = round(duration * TIMESCALE)
+        ET.SubElement(timeline, "S", {"t": str(t), "d": str(d)})
+        t += d
+    for _, uri, byterange in run["segments"]:
+        segment_url = {"media": uri}
+        if byterange:
+            segment_url["mediaRange"] = format_range(byterange)
+        ET.SubElement(segment_list, "SegmentURL", segment_url)
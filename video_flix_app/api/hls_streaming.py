@@ -0,0 +1,52 @@
+import os
+import threading
+
+SEGMENT_EXTENSIONS = (".ts", ".m4s")
+
+
+class SegmentUploader(threading.Thread):
+    """
+    Watches an HLS output directory while ffmpeg is writing it and uploads
+    every finished segment right away. ffmpeg runs with -hls_flags temp_file,
+    so a segment only appears under its final name once it is complete.
+    upload(paths) uploads a batch and returns the paths that succeeded.
+    Uploaded segments are removed locally to keep scratch disk usage bounded.
+    """
+
+    def __init__(self, directory, upload, interval=1.0):
+        super().__init__(daemon=True)
+        self.directory = directory
+        self.upload = upload
+        self.interval = interval
+        self.uploaded = set()
+        self._stop_event = threading.Event()
+
+    def finished_segments(self):
+        """Return the finished, not yet uploaded segment file names."""
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted(
+            fname for fname in os.listdir(self.directory)
+            if fname.endswith(SEGMENT_EXTENSIONS) and fname not in self.uploaded
+        )
+
+    def upload_finished_segments(self):
+        """Upload and remove all segments that ffmpeg has finished."""
+        paths = [os.path.join(self.directory, fname)
+                 for fname in self.finished_segments()]
+        if not paths:
+            return
+        for path in self.upload(paths):
+            self.uploaded.add(os.path.basename(path))
+            os.unlink(path)
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            self.upload_finished_segments()
+
+    def stop(self, flush=True):
+        """Stop watching and optionally upload the remaining finished segments."""
+        self._stop_event.set()
+        self.join()
+        if flush:
+            self.upload_finished_segments()
@@ -0,0 +1,171 @@
+import os
+import re
+import time
+from urllib.parse import urlparse
+from xml.sax.saxutils import escape
+
+from botocore.exceptions import ClientError
+from django.conf import settings
+from django.core.cache import cache
+
+from video_flix_app.api.serializers import (
+    get_s3_client, get_content_type, build_presigned_url)
+
+KEY_PREFIX = "hls_playlist"
+URI_ATTRIBUTE = 'URI="'
+MPD_URI_ATTRIBUTE = re.compile(r'\b(sourceURL|media)="([^"]*)"')
+VTT_FRAGMENT = "#xywh="
+
+
+def get_uri_name(uri):
+    """Return the file name of a playlist URI (relative or a signed URL)."""
+    return os.path.basename(urlparse(uri).path)
+
+
+def rewrite_uris(text, rewrite):
+    """
+    Return playlist text with every URI (URI lines, EXT-X-MAP and
+    EXT-X-MEDIA URI attributes) replaced by rewrite(file name). Works on
+    unsigned templates and on playlists with signed URLs baked in.
+    """
+    lines = []
+    for line in text.splitlines():
+        if line.startswith("#") and URI_ATTRIBUTE in line:
+            head, _, rest = line.partition(URI_ATTRIBUTE)
+            uri, _, tail = rest.partition('"')
+            line = f'{head}{URI_ATTRIBUTE}{rewrite(get_uri_name(uri))}"{tail}'
+        elif line and not line.startswith("#"):
+            line = rewrite(get_uri_name(line))
+        lines.append(line)
+    return "\n".join(lines) + "\n"
+
+
+def rewrite_mpd_uris(text, rewrite):
+    """
+    Return DASH manifest text with every Initialization and SegmentURL
+    URI replaced by rewrite(file name), escaped for the XML attribute.
+    """
+    def replace(match):
+        uri = rewrite(get_uri_name(match.group(2)))
+        return f'{match.group(1)}="{escape(uri)}"'
+
+    return MPD_URI_ATTRIBUTE.sub(replace, text)
+
+
+def rewrite_vtt_uris(text, rewrite):
+    """
+    Return trickplay WebVTT text with the sprite sheet URI of every cue
+    replaced by rewrite(file name), keeping its #xywh fragment.
+    """
+    lines = []
+    for line in text.splitlines():
+        if VTT_FRAGMENT in line:
+            uri, _, fragment = line.partition(VTT_FRAGMENT)
+            line = f"{rewrite(get_uri_name(uri))}{VTT_FRAGMENT}{fragment}"
+        lines.append(line)
+    return "\n".join(lines) + "\n"
+
+
+def get_signer(prefix, expiration):
+    """
+    Return sign(file name) signing the files next to prefix once each, all
+    with one S3 client (building a client per file dominates the render).
+    """
+    s3_client = get_s3_client()
+    signed_urls = {}
+
+    def sign(fname):
+        if fname not in signed_urls:
+            s3_key = f"{prefix}{fname}"
+            signed_urls[fname] = build_presigned_url(
+                s3_client, s3_key, get_content_type(s3_key), expiration)
+        return signed_urls[fname]
+
+    return sign
+
+
+def get_window(now=None):
+    """Return the number of the current signing window (HLS_PLAYLIST_SIGNING_WINDOW)."""
+    return int((now or time.time()) // settings.HLS_PLAYLIST_SIGNING_WINDOW)
+
+
+def get_cache_key(s3_key, window):
+    """Return the cache key of a playlist rendered in a signing window."""
+    return f"{KEY_PREFIX}:{s3_key}:{window}"
+
+
+def load_template(s3_key):
+    """Return the stored playlist text of s3_key, or None if it does not exist."""
+    try:
+        response = get_s3_client().get_object(
+            Bucket=settings.AWS_STORAGE_BUCKET_NAME, Key=s3_key)
+    except ClientError:
+        return None
+    return response["Body"].read().decode("utf-8")
+
+
+def render(s3_key, rewrite_text):
+    """
+    Return the playlist s3_key rendered by rewrite_text(template), cached
+    until the end of the current signing window. Returns None if the
+    playlist does not exist.
+    """
+    now = time.time()
+    window = get_window(now)
+    key = get_cache_key(s3_key, window)
+    text = cache.get(key)
+    if text is None:
+        template = load_template(s3_key)
+        if template is None:
+            return None
+        text = rewrite_text(template)
+        window_end = (window + 1) * settings.HLS_PLAYLIST_SIGNING_WINDOW
+        cache.set(key, text, timeout=max(1, int(window_end - now)))
+    return text
+
+
+def render_master(master_key, get_variant_url):
+    """
+    Render a master playlist whose variant and audio playlists point at
+    get_variant_url(file name), the request-time playlist endpoint. Only the
+    file names are cached: deduplicated videos share one master but each
+    has its own endpoint, so the URLs are filled in per request.
+    """
+    text = render(master_key,
+                  lambda text: rewrite_uris(text, lambda fname: fname))
+    return text and rewrite_uris(text, get_variant_url)
+
+
+def render_signed(s3_key, rewrite_uris_of):
+    """
+    Render a file whose URIs point at files in its own directory with
+    freshly signed URLs, using rewrite_uris_of(text, sign) to find them.
+    """
+    prefix = f"{os.path.dirname(s3_key)}/"
+    expiration = 2 * settings.HLS_PLAYLIST_SIGNING_WINDOW
+    return render(s3_key, lambda text: rewrite_uris_of(
+        text, get_signer(prefix, expiration)))
+
+
+def render_media(master_key, fname):
+    """
+    Render a variant (or audio) playlist next to master_key with freshly
+    signed segment URLs. Every URL stays valid at least one full window
+    after the rendered playlist is last served from the cache.
+    """
+    return render_signed(f"{os.path.dirname(master_key)}/{fname}", rewrite_uris)
+
+
+def render_manifest(manifest_key):
+    """Render a DASH manifest with freshly signed segment URLs."""
+    return render_signed(manifest_key, rewrite_mpd_uris)
+
+
+def render_trickplay(vtt_key):
+    """Render a trickplay WebVTT track with freshly signed sprite sheet URLs."""
+    return render_signed(vtt_key, rewrite_vtt_uris)
+
+
+def invalidate(s3_key):
+    """Drop the rendering of s3_key in the current window, e.g. after a republish."""
+    cache.delete(get_cache_key(s3_key, get_window()))
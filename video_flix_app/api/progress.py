@@ -0,0 +1,153 @@
+import subprocess
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+
+from video_flix_app.api import checkpoints
+
+KEY_PREFIX = "transcode_progress"
+PROGRESS_TTL = 86400
+
+_current_target = ContextVar("transcode_progress_target", default=None)
+
+
+def get_run_key(base_name):
+    """Return the cache key holding the duration and steps of a transcode run."""
+    return f"{KEY_PREFIX}:{base_name}"
+
+
+def get_step_key(base_name, step):
+    """Return the cache key of the progress of one step ('720p', 'audio', ...)."""
+    return f"{KEY_PREFIX}:{base_name}:{step}"
+
+
+def register(base_name, steps=(), duration=None):
+    """
+    Add steps to the transcode run of a video so readers find their
+    progress keys, and record the source duration (seconds) used for the
+    percentage of steps that do not pass their own. Returns the run.
+    """
+    with checkpoints.lock(f"{base_name}:progress"):
+        run = cache.get(get_run_key(base_name)) or \
+            {"duration": None, "steps": []}
+        if duration:
+            run["duration"] = duration
+        run["steps"] += [step for step in steps if step not in run["steps"]]
+        cache.set(get_run_key(base_name), run, timeout=PROGRESS_TTL)
+    return run
+
+
+@contextmanager
+def track(base_name, *steps, duration=None):
+    """
+    Report the progress of the ffmpeg runs inside the block (via run_ffmpeg)
+    under steps. One ffmpeg pass may encode several renditions at once.
+    """
+    run = register(base_name, steps)
+    token = _current_target.set(
+        (base_name, steps, duration or run["duration"]))
+    try:
+        yield
+    finally:
+        _current_target.reset(token)
+
+
+def parse_progress(lines):
+    """
+    Yield one dict per block of ffmpeg -progress output. Every block
+    ends with a 'progress=continue' or 'progress=end' line.
+    """
+    values = {}
+    for line in lines:
+        key, _, value = line.strip().partition("=")
+        if not key:
+            continue
+        values[key] = value
+        if key == "progress":
+            yield values
+            values = {}
+
+
+def parse_number(value):
+    """Return a float of an ffmpeg progress value ('N/A' and '1.5x' allowed)."""
+    try:
+        return float(str(value).rstrip("x"))
+    except ValueError:
+        return None
+
+
+def summarize(values, duration=None):
+    """
+    Return percent, fps and ETA (seconds) of one progress block.
+    Percent and ETA are None while the duration or speed is unknown.
+    """
+    done = values.get("progress") == "end"
+    out_time = (parse_number(values.get("out_time_us")) or 0) / 1000000
+    speed = parse_number(values.get("speed"))
+    percent, eta = None, None
+    if duration:
+        percent = round(min(out_time / duration, 1.0) * 100, 1)
+        if speed:
+            eta = round(max(duration - out_time, 0) / speed)
+    if done:
+        percent, eta = 100.0, 0
+    return {
+        "status": "done" if done else "running",
+        "percent": percent,
+        "fps": parse_number(values.get("fps")),
+        "eta": eta,
+        "updated": time.time(),
+    }
+
+
+def report(base_name, steps, summary):
+    """Store the latest progress of steps."""
+    cache.set_many({get_step_key(base_name, step): summary for step in steps},
+                   timeout=PROGRESS_TTL)
+
+
+def run_ffmpeg(command):
+    """
+    Run an ffmpeg command (raising CalledProcessError on failure). Inside
+    track() its -progress output is parsed while it runs and reported at
+    most every HLS_PROGRESS_INTERVAL seconds.
+    """
+    target = _current_target.get()
+    if target is None:
+        subprocess.run(command, check=True)
+        return
+    base_name, steps, duration = target
+    process = subprocess.Popen(
+        [command[0], "-progress", "pipe:1", *command[1:]],
+        stdout=subprocess.PIPE, text=True)
+    last_report, summary = 0.0, summarize({}, duration)
+    for values in parse_progress(process.stdout):
+        summary = summarize(values, duration)
+        now = time.monotonic()
+        if values["progress"] == "end" or \
+                now - last_report >= settings.HLS_PROGRESS_INTERVAL:
+            report(base_name, steps, summary)
+            last_report = now
+    returncode = process.wait()
+    if returncode:
+        report(base_name, steps, {**summary, "status": "failed"})
+        raise subprocess.CalledProcessError(returncode, command)
+
+
+def get_progress(base_name):
+    """
+    Return {"duration": seconds, "renditions": {step: progress}} of the
+    current or last transcode, or None if there is none.
+    """
+    run = cache.get(get_run_key(base_name))
+    if run is None:
+        return None
+    keys = {get_step_key(base_name, step): step for step in run["steps"]}
+    found = cache.get_many(list(keys))
+    return {
+        "duration": run["duration"],
+        "renditions": {keys[key]: found.get(key) for key in keys},
+    }
@@ -0,0 +1,123 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from boto3.exceptions import S3UploadFailedError
+from boto3.s3.transfer import TransferConfig
+from botocore.exceptions import BotoCoreError, ClientError
+
+MB = 1024 ** 2
+
+TRANSFER_CONFIG = TransferConfig(
+    multipart_threshold=64 * MB,
+    multipart_chunksize=16 * MB,
+    max_concurrency=4,
+    use_threads=True,
+)
+
+RETRY_BACKOFF_SECONDS = 0.5
+DELETE_BATCH_SIZE = 1000
+
+
+def upload_file_with_retry(s3_client, bucket, local_path, s3_key, retries):
+    """
+    Upload one file, retrying with exponential backoff.
+    Return None on success or the last error message.
+    """
+    error = None
+    for attempt in range(retries + 1):
+        try:
+            s3_client.upload_file(local_path, bucket, s3_key,
+                                  Config=TRANSFER_CONFIG)
+            return None
+        except (BotoCoreError, ClientError, S3UploadFailedError,
+                OSError) as e:
+            error = e
+            if attempt < retries:
+                time.sleep(RETRY_BACKOFF_SECONDS * 2 ** attempt)
+    return str(error)
+
+
+def bulk_upload(s3_client, bucket, files, max_workers=8, retries=2):
+    """
+    Upload (local_path, s3_key) pairs concurrently with one shared client.
+    Return a report with the uploaded keys, failed keys and their errors,
+    and the number of bytes uploaded.
+    """
+    report = {"uploaded": [], "failed": {}, "bytes": 0}
+    if not files:
+        return report
+    sizes = {s3_key: os.path.getsize(path) for path, s3_key in files}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            s3_key: executor.submit(upload_file_with_retry, s3_client, bucket,
+                                    path, s3_key, retries)
+            for path, s3_key in files
+        }
+    for s3_key, future in futures.items():
+        error = future.result()
+        if error:
+            report["failed"][s3_key] = error
+        else:
+            report["uploaded"].append(s3_key)
+            report["bytes"] += sizes[s3_key]
+    return report
+
+
+def iter_objects(s3_client, bucket, prefix):
+    """Yield every object ({"Key", "Size", ...}) below prefix, page by page."""
+    kwargs = {"Bucket": bucket, "Prefix": prefix}
+    while True:
+        response = s3_client.list_objects_v2(**kwargs)
+        yield from response.get("Contents", [])
+        if not response.get("IsTruncated"):
+            return
+        kwargs["ContinuationToken"] = response["NextContinuationToken"]
+
+
+def delete_batch_with_retry(s3_client, bucket, keys, retries):
+    """
+    Delete up to DELETE_BATCH_SIZE keys with one DeleteObjects request.
+    Keys that fail (per-key errors or a failed request) are retried with
+    exponential backoff. Return {key: last error} of the keys left over.
+    """
+    failed = {}
+    for attempt in range(retries + 1):
+        try:
+            response = s3_client.delete_objects(
+                Bucket=bucket,
+                Delete={"Objects": [{"Key": key} for key in keys],
+                        "Quiet": True})
+            failed = {error["Key"]: error.get("Message", error.get("Code"))
+                      for error in response.get("Errors", [])}
+        except (BotoCoreError, ClientError) as e:
+            failed = {key: str(e) for key in keys}
+        if not failed:
+            return failed
+        keys = list(failed)
+        if attempt < retries:
+            time.sleep(RETRY_BACKOFF_SECONDS * 2 ** attempt)
+    return failed
+
+
+def bulk_delete(s3_client, bucket, keys, max_workers=8, retries=2):
+    """
+    Delete keys in DeleteObjects batches of DELETE_BATCH_SIZE, sent
+    concurrently with one shared client. Return a report with the deleted
+    keys and the failed keys with their errors.
+    """
+    keys = list(dict.fromkeys(keys))
+    report = {"deleted": [], "failed": {}}
+    batches = [keys[i:i + DELETE_BATCH_SIZE]
+               for i in range(0, len(keys), DELETE_BATCH_SIZE)]
+    if not batches:
+        return report
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(delete_batch_with_retry, s3_client,
+                                   bucket, batch, retries)
+                   for batch in batches]
+    for batch, future in zip(batches, futures):
+        failed = future.result()
+        report["failed"].update(failed)
+        report["deleted"] += [key for key in batch if key not in failed]
+    return report
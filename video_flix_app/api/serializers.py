@@ -1,12 +1,22 @@
+import time
+from functools import lru_cache
+
 from rest_framework import serializers
 from django.conf import settings
+from django.core.cache import cache
+from django.urls import reverse
 import boto3
 from botocore.exceptions import ClientError
 from ..models import Video, UserWatchHistory
 
+PRESIGNED_URL_CACHE_PREFIX = "presigned_url"
+PRESIGNED_URL_LRU_SIZE = 4096
+
 
 def get_s3_client():
-    """Get configured S3/MinIO client."""
+    """Get the injected settings.S3_CLIENT or the configured S3/MinIO client."""
+    if settings.S3_CLIENT is not None:
+        return settings.S3_CLIENT
     return boto3.client(
         's3',
         endpoint_url=settings.AWS_S3_ENDPOINT_URL,
@@ -35,10 +45,18 @@ def get_content_type(s3_key):
         return 'image/jpeg'
     elif ext.endswith('.png'):
         return 'image/png'
+    elif ext.endswith('.webp'):
+        return 'image/webp'
     elif ext.endswith('.m3u8'):
         return 'application/vnd.apple.mpegurl'
     elif ext.endswith('.ts'):
         return 'video/mp2t'
+    elif ext.endswith('.m4s'):
+        return 'video/iso.segment'
+    elif ext.endswith('.mpd'):
+        return 'application/dash+xml'
+    elif ext.endswith('.vtt'):
+        return 'text/vtt'
     return 'application/octet-stream'
 
 
@@ -66,33 +84,130 @@ def generate_presigned_url(s3_key, expiration=604800):
     return build_presigned_url(s3_client, s3_key, content_type, expiration)
 
 
+def get_url_window(expiration):
+    """
+    Return the length of the expiry buckets for URLs signed for expiration
+    seconds: PRESIGNED_URL_CACHE_WINDOW, but at most half the lifetime, so
+    a cached URL is still valid for at least half of it when handed out.
+    """
+    return min(settings.PRESIGNED_URL_CACHE_WINDOW, expiration // 2)
+
+
+class SigningError(Exception):
+    """Raised when a presigned URL could not be generated."""
+
+
+@lru_cache(maxsize=PRESIGNED_URL_LRU_SIZE)
+def load_bucket_url(s3_key, content_type, expiration, bucket, window):
+    """
+    Return the URL of s3_key signed in one expiry bucket, shared across
+    processes through the cache until the bucket ends. Raises SigningError
+    instead of returning None, so a failed signing is never cached.
+    """
+    key = (f"{PRESIGNED_URL_CACHE_PREFIX}:{content_type}:{expiration}:"
+           f"{bucket}:{s3_key}")
+    url = cache.get(key)
+    if url is None:
+        url = generate_presigned_url(s3_key, expiration)
+        if url is None:
+            raise SigningError(s3_key)
+        timeout = max(1, int((bucket + 1) * window - time.time()))
+        cache.set(key, url, timeout=timeout)
+    return url
+
+
+def get_bucket_url(s3_key, content_type, expiration, bucket, window):
+    """Return the URL of s3_key signed in one expiry bucket, or None."""
+    try:
+        return load_bucket_url(s3_key, content_type, expiration, bucket,
+                               window)
+    except SigningError:
+        return None
+
+
+def get_cached_presigned_url(s3_key, expiration=604800):
+    """
+    Return a presigned URL that stays the same for all requests within an
+    expiry bucket, so browsers and CDNs can cache the object. Each process
+    keeps recent URLs in an LRU in front of the shared cache.
+    """
+    window = get_url_window(expiration)
+    if window <= 0:
+        return generate_presigned_url(s3_key, expiration)
+    return get_bucket_url(s3_key, get_content_type(s3_key), expiration,
+                          int(time.time() // window), window)
+
+
+def get_rendered_url(obj, context, s3_key, url_name):
+    """
+    Return the URL players load a playlist, manifest or track from: its
+    endpoint (url_name) with request-time signing, otherwise a signed S3 URL.
+    """
+    if not s3_key:
+        return None
+    if not settings.HLS_REQUEST_TIME_SIGNING:
+        return get_cached_presigned_url(s3_key)
+    url = reverse(url_name, args=[obj.pk])
+    request = context.get('request')
+    return request.build_absolute_uri(url) if request else url
+
+
+def get_hls_playlist_url(obj, context):
+    """Return the URL players load the HLS master playlist from."""
+    return get_rendered_url(obj, context, obj.hls_playlist, 'video-playlist')
+
+
 class VideoSerializer(serializers.ModelSerializer):
     thumbnail_url = serializers.SerializerMethodField()
+    thumbnail_variant_urls = serializers.SerializerMethodField()
     hls_playlist_url = serializers.SerializerMethodField()
+    dash_manifest_url = serializers.SerializerMethodField()
+    trickplay_vtt_url = serializers.SerializerMethodField()
     watch_progress = serializers.SerializerMethodField()
 
     class Meta:
         model = Video
         fields = [
             "id", "title", "description", "duration", "video_file",
-            "genre", "thumbnail", "thumbnail_url", "hls_playlist", "hls_playlist_url",
-            "watch_progress",
+            "genre", "thumbnail", "thumbnail_url", "thumbnail_variant_urls",
+            "hls_playlist", "hls_playlist_url", "dash_manifest", "dash_manifest_url",
+            "trickplay_vtt", "trickplay_vtt_url", "watch_progress",
+            "width", "height", "fps", "video_codec", "audio_codec", "bitrate", "file_size",
             "created_at", "updated_at",
         ]
         read_only_fields = [
             "id", "created_at", "duration",
-            "thumbnail", "hls_playlist", "thumbnail_url", "hls_playlist_url", "watch_progress"
+            "thumbnail", "hls_playlist", "thumbnail_url", "hls_playlist_url", "watch_progress",
+            "trickplay_vtt", "trickplay_vtt_url", "thumbnail_variant_urls",
+            "dash_manifest", "dash_manifest_url",
+            "width", "height", "fps", "video_codec", "audio_codec", "bitrate", "file_size",
         ]
 
     def get_thumbnail_url(self, obj):
         if obj.thumbnail:
-            return generate_presigned_url(obj.thumbnail)
+            return get_cached_presigned_url(obj.thumbnail)
         return None
 
+    def get_thumbnail_variant_urls(self, obj):
+        """Return {format: {width: url}} for building srcset attributes."""
+        if not obj.thumbnail_variants:
+            return None
+        return {
+            fmt: {width: get_cached_presigned_url(key)
+                  for width, key in by_width.items()}
+            for fmt, by_width in obj.thumbnail_variants.items()
+        }
+
     def get_hls_playlist_url(self, obj):
-        if obj.hls_playlist:
-            return generate_presigned_url(obj.hls_playlist)
-        return None
+        return get_hls_playlist_url(obj, self.context)
+
+    def get_dash_manifest_url(self, obj):
+        return get_rendered_url(obj, self.context, obj.dash_manifest,
+                                'video-manifest')
+
+    def get_trickplay_vtt_url(self, obj):
+        return get_rendered_url(obj, self.context, obj.trickplay_vtt,
+                                'video-trickplay')
 
     def get_watch_progress(self, obj):
         user_watch_history = getattr(obj, 'user_watch_history', [])
@@ -122,13 +237,11 @@ class WatchlistVideoSerializer(serializers.ModelSerializer):
 
     def get_thumbnail_url(self, obj):
         if obj.thumbnail:
-            return generate_presigned_url(obj.thumbnail)
+            return get_cached_presigned_url(obj.thumbnail)
         return None
 
     def get_hls_playlist_url(self, obj):
-        if obj.hls_playlist:
-            return generate_presigned_url(obj.hls_playlist)
-        return None
+        return get_hls_playlist_url(obj, self.context)
 
 
 class UserWatchHistorySerializer(serializers.ModelSerializer):
@@ -1,13 +1,20 @@
 from django.db.models.signals import post_save, post_delete
 from django.core.cache import cache
 from datetime import datetime, timezone
+from contextlib import contextmanager
+from contextvars import ContextVar
 import time
 from django.dispatch import receiver
 import django_rq
 from video_flix_app.models import Video, UserWatchHistory
-from video_flix_app.api.tasks import process_video_pipeline, delete_video_assets_from_s3
+from video_flix_app.api.tasks import (
+    process_video_pipeline, delete_video_assets_from_s3,
+    bulk_delete_video_assets_from_s3, get_thumbnail_variant_keys,
+    get_deletion_retry)
 from utils.export_utils import export_model_to_s3
 
+_pending_deletions = ContextVar("pending_video_deletions", default=None)
+
 
 @receiver(post_save, sender=Video)
 def enqueue_video_processing(sender, instance, created, **kwargs):
@@ -18,22 +25,49 @@ def enqueue_video_processing(sender, instance, created, **kwargs):
     if created and instance.video_file:
         s3_key = instance.video_file.name
 
-        queue = django_rq.get_queue('default')
+        queue = django_rq.get_queue('media-light')
         queue.enqueue(process_video_pipeline, s3_key, instance.id)
 
 
+def get_video_assets(instance):
+    """Return the delete_video_assets_from_s3 arguments of a Video."""
+    return (instance.hls_playlist, instance.thumbnail, instance.video_file.name,
+            get_thumbnail_variant_keys(instance.thumbnail_variants))
+
+
+@contextmanager
+def batch_video_deletions():
+    """
+    Collect the assets of all Videos deleted inside the block and delete
+    them with one job afterwards instead of one job per row.
+    """
+    pending = []
+    token = _pending_deletions.set(pending)
+    try:
+        yield
+    finally:
+        _pending_deletions.reset(token)
+    if pending:
+        queue = django_rq.get_queue('maintenance')
+        queue.enqueue(bulk_delete_video_assets_from_s3, pending,
+                      retry=get_deletion_retry())
+
+
 @receiver(post_delete, sender=Video)
 def enqueue_video_deletion(sender, instance, **kwargs):
     """
     Enqueue deletion of thumbnail, video file and HLS files in S3 when a Video is deleted.
+    Inside batch_video_deletions() the assets are collected for one bulk job.
     """
-    hls_key = instance.hls_playlist
-    thumbnail_key = instance.thumbnail
-    video_file_key = instance.video_file.name
+    assets = get_video_assets(instance)
+    pending = _pending_deletions.get()
+    if pending is not None:
+        pending.append(assets)
+        return
 
-    queue = django_rq.get_queue('default')
-    queue.enqueue(delete_video_assets_from_s3, hls_key,
-                  thumbnail_key, video_file_key)
+    queue = django_rq.get_queue('maintenance')
+    queue.enqueue(delete_video_assets_from_s3, *assets,
+                  retry=get_deletion_retry())
 
 
 @receiver(post_save, sender=Video)
@@ -0,0 +1,149 @@
+import os
+import fcntl
+import hashlib
+from contextlib import contextmanager
+
+from django.conf import settings
+
+LOCK_SUFFIX = ".lock"
+PART_MARKER = ".part"
+CACHE_LOCK_NAME = ".cache.lock"
+
+
+def get_cache_dir():
+    """Return the worker-local source cache directory, creating it if needed."""
+    cache_dir = settings.VIDEO_SOURCE_CACHE_DIR
+    os.makedirs(cache_dir, exist_ok=True)
+    return cache_dir
+
+
+def get_entry_path(cache_dir, key, version):
+    """Return the cache path for one version (ETag) of an S3 key."""
+    digest = hashlib.sha256(f"{key}:{version}".encode()).hexdigest()
+    return os.path.join(cache_dir, f"{digest}{os.path.splitext(key)[1]}")
+
+
+@contextmanager
+def cache_lock(cache_dir, mode):
+    """Hold the cache-wide lock that serializes eviction."""
+    with open(os.path.join(cache_dir, CACHE_LOCK_NAME), "a") as lock_file:
+        fcntl.flock(lock_file, mode)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def is_complete(path, size):
+    """Return True if the entry exists with the expected size."""
+    return os.path.exists(path) and os.path.getsize(path) == size
+
+
+def list_entries(cache_dir):
+    """Return (mtime, size, path) of all cached files, least recently used first."""
+    entries = []
+    for name in os.listdir(cache_dir):
+        if name.endswith(LOCK_SUFFIX) or PART_MARKER in name:
+            continue
+        path = os.path.join(cache_dir, name)
+        stat = os.stat(path)
+        entries.append((stat.st_mtime, stat.st_size, path))
+    return sorted(entries)
+
+
+def is_current(lock_file, lock_path):
+    """Return True if lock_file is still the lock file at lock_path."""
+    try:
+        return os.stat(lock_path).st_ino == os.fstat(lock_file.fileno()).st_ino
+    except FileNotFoundError:
+        return False
+
+
+@contextmanager
+def entry_lock(path, mode):
+    """
+    Hold the lock file of one entry. Eviction removes lock files, so a
+    lock taken on a file that was unlinked meanwhile is retried.
+    """
+    lock_path = path + LOCK_SUFFIX
+    while True:
+        lock_file = open(lock_path, "a")
+        try:
+            fcntl.flock(lock_file, mode)
+        except BlockingIOError:
+            lock_file.close()
+            raise
+        if is_current(lock_file, lock_path):
+            break
+        lock_file.close()
+    try:
+        yield lock_file
+    finally:
+        fcntl.flock(lock_file, fcntl.LOCK_UN)
+        lock_file.close()
+
+
+def remove_entry(path):
+    """Delete an entry and its lock file; the caller holds the entry lock."""
+    if os.path.exists(path):
+        os.unlink(path)
+    os.unlink(path + LOCK_SUFFIX)
+
+
+def try_remove_entry(path):
+    """Delete an entry unless another process is currently reading it."""
+    try:
+        with entry_lock(path, fcntl.LOCK_EX | fcntl.LOCK_NB):
+            remove_entry(path)
+            return True
+    except BlockingIOError:
+        return False
+
+
+def evict(cache_dir, needed, keep=None):
+    """
+    Remove least recently used entries until needed bytes fit into
+    VIDEO_SOURCE_CACHE_MAX_BYTES. Entries in use are skipped.
+    """
+    with cache_lock(cache_dir, fcntl.LOCK_EX):
+        entries = list_entries(cache_dir)
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total + needed <= settings.VIDEO_SOURCE_CACHE_MAX_BYTES:
+                break
+            if path != keep and try_remove_entry(path):
+                total -= size
+
+
+def fill_entry(path, download):
+    """Download into a private part file and move it into place atomically."""
+    part_path = f"{path}{PART_MARKER}{os.getpid()}"
+    try:
+        download(part_path)
+        os.replace(part_path, path)
+    finally:
+        if os.path.exists(part_path):
+            os.unlink(part_path)
+
+
+@contextmanager
+def open_cached(key, version, size, download):
+    """
+    Yield the local path of the cached copy of key at the given version.
+    On a miss, download(path) fills the entry while other processes wait
+    for it. The entry stays protected from eviction until the context exits.
+    """
+    cache_dir = get_cache_dir()
+    path = get_entry_path(cache_dir, key, version)
+    with entry_lock(path, fcntl.LOCK_EX) as lock_file:
+        if not is_complete(path, size):
+            evict(cache_dir, size, keep=path)
+            try:
+                fill_entry(path, download)
+            except BaseException:
+                remove_entry(path)
+                raise
+        os.utime(path)
+        with cache_lock(cache_dir, fcntl.LOCK_SH):
+            fcntl.flock(lock_file, fcntl.LOCK_SH)
+        yield path
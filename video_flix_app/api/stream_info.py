@@ -0,0 +1,13 @@
+def measure_bitrates(segments):
+    """
+    Return the peak and average bitrate (bits/s) of [(duration, size), ...].
+    The peak is the highest bitrate of a single segment, as HLS defines
+    BANDWIDTH. Returns (None, None) for no measurable segments.
+    """
+    segments = [(d, size) for d, size in segments if d > 0 and size]
+    if not segments:
+        return None, None
+    peak = max(size * 8 / d for d, size in segments)
+    average = sum(size for _, size in segments) * 8 / \
+        sum(d for d, _ in segments)
+    return round(peak), round(average)
@@ -1,21 +1,84 @@
 import os
+import json
 import subprocess
 import tempfile
 import django_rq
+import math
+import hashlib
 import boto3
-import tempfile
-from moviepy.editor import VideoFileClip
+from contextlib import contextmanager
+from functools import lru_cache
+from urllib.parse import urlparse
 
-from botocore.exceptions import NoCredentialsError, ClientError
+from botocore.config import Config
+from botocore.exceptions import BotoCoreError, NoCredentialsError, ClientError
 from django.conf import settings
 from django_rq import job
+from rq import Retry
+from PIL import Image
 from utils.export_utils import export_model_to_s3
 from video_flix_app.models import Video, UserWatchHistory
 from video_flix_app.api.serializers import generate_presigned_url
+from video_flix_app.api import (
+    source_cache, s3_transfer, dash_manifest, checkpoints, progress,
+    admission, stream_info, playlists)
+from video_flix_app.api.hls_streaming import SegmentUploader
+
+DEFAULT_LADDER_HEIGHTS = [120, 360, 720, 1080]
+COMPLEXITY_SAMPLE_SECONDS = 20
+COMPLEXITY_REFERENCE_KBPS = 1000
+COMPLEXITY_MIN, COMPLEXITY_MAX = 0.3, 1.5
+PROBE_URL_EXPIRATION = 900
+TRICKPLAY_STEP = "trickplay"
+RETRY_INTERVALS = [60, 300]
+AUDIO_BITRATE_KBPS = 128
+AUDIO_GROUP_ID = "audio"
+AUDIO_RENDITION = "audio"
+TRICKPLAY_INTERVAL = 10
+TRICKPLAY_WIDTH = 160
+TRICKPLAY_COLUMNS, TRICKPLAY_ROWS = 5, 5
+THUMBNAIL_FORMATS = {
+    "webp": ("WEBP", ".webp", {"quality": 80, "method": 4}),
+    "jpeg": ("JPEG", ".jpg", {"quality": 82, "optimize": True,
+                              "progressive": True}),
+}
+MEDIA_METADATA_FIELDS = [
+    "duration", "width", "height", "fps",
+    "video_codec", "audio_codec", "bitrate", "file_size",
+]
+SHARED_ASSET_FIELDS = [
+    "thumbnail", "thumbnail_variants", "hls_playlist",
+    "dash_manifest", "trickplay_vtt",
+]
+HASH_CHUNK_SIZE = 8 * 1024 * 1024
+THUMBNAIL_THREADS = 1
+MEDIA_HEADER_BYTES = 256 * 1024
+# ffprobe H.264 profile -> RFC 6381 profile_idc and constraint flags (hex)
+AVC_PROFILE_PREFIXES = {
+    "Constrained Baseline": "42e0", "Baseline": "4200", "Main": "4d40",
+    "Extended": "5800", "High": "6400", "High 10": "6e00",
+    "High 4:2:2": "7a00", "High 4:4:4 Predictive": "f400",
+}
+AAC_PROFILE_CODECS = {"LC": "mp4a.40.2", "HE-AAC": "mp4a.40.5",
+                      "HE-AACv2": "mp4a.40.29"}
 
 
 def get_s3_client():
-    """Get configured S3/MinIO client."""
+    """
+    Get the S3 client: settings.S3_CLIENT when one is injected, otherwise
+    the configured S3/MinIO client.
+    """
+    if settings.S3_CLIENT is not None:
+        return settings.S3_CLIENT
+    return create_s3_client()
+
+
+@lru_cache(maxsize=None)
+def create_s3_client():
+    """
+    Create the configured S3/MinIO client. The client is thread-safe and
+    shared within the worker process so its connection pool is reused.
+    """
     return boto3.client(
         's3',
         endpoint_url=settings.AWS_S3_ENDPOINT_URL,
@@ -23,7 +86,8 @@ def get_s3_client():
         aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
         region_name=settings.AWS_S3_REGION_NAME,
         use_ssl=settings.AWS_S3_USE_SSL,
-        verify=settings.AWS_S3_VERIFY
+        verify=settings.AWS_S3_VERIFY,
+        config=Config(max_pool_connections=settings.S3_UPLOAD_WORKERS * 2)
     )
 
 
@@ -44,24 +108,77 @@ def upload_to_s3(local_path, s3_key):
     try:
         s3_client = get_s3_client()
         s3_client.upload_file(
-            local_path, settings.AWS_STORAGE_BUCKET_NAME, s3_key)
+            local_path, settings.AWS_STORAGE_BUCKET_NAME, s3_key,
+            Config=s3_transfer.TRANSFER_CONFIG)
         return True
     except (NoCredentialsError, ClientError) as e:
         print(f"Error uploading to S3: {e}")
         return False
 
 
-def delete_s3_object(s3_client, key):
+def get_source_version(video_s3_key):
+    """Return ETag and size of the source object in S3/MinIO."""
+    response = get_s3_client().head_object(
+        Bucket=settings.AWS_STORAGE_BUCKET_NAME, Key=video_s3_key)
+    return response["ETag"].strip('"'), response["ContentLength"]
+
+
+@contextmanager
+def local_source(video_s3_key):
     """
-    Deletes a single object from S3 using the given key.
+    Yield a local path of the source video. All pipeline stages read the
+    source through the worker-local cache, so each worker downloads it once.
+    A fresh download is hashed for VIDEO_DEDUPLICATION while it is still in
+    the page cache, so the source is never read from S3 just to hash it.
     """
     try:
-        s3_client.delete_object(
-            Bucket=settings.AWS_STORAGE_BUCKET_NAME,
-            Key=key
-        )
-    except Exception as e:
-        print(f"Error deleting object {key}: {e}")
+        etag, size = get_source_version(video_s3_key)
+    except (NoCredentialsError, ClientError) as e:
+        raise Exception(f"Failed to download video: {video_s3_key}") from e
+
+    def download(local_path):
+        if not download_from_s3(video_s3_key, local_path):
+            raise Exception(f"Failed to download video: {video_s3_key}")
+        if settings.VIDEO_DEDUPLICATION:
+            store_source_hash(video_s3_key, local_path)
+
+    with source_cache.open_cached(video_s3_key, etag, size, download) as path:
+        yield path
+
+
+@contextmanager
+def source_input(video_s3_key):
+    """
+    Yield the ffmpeg input for the source video. With
+    VIDEO_SOURCE_INPUT=presigned this is a short-lived presigned URL that
+    ffmpeg reads with HTTP range requests, otherwise a path in the
+    worker-local source cache.
+    """
+    if settings.VIDEO_SOURCE_INPUT == "presigned":
+        url = generate_presigned_url(
+            video_s3_key, expiration=settings.VIDEO_SOURCE_URL_EXPIRATION)
+        if url:
+            yield url
+            return
+    with local_source(video_s3_key) as path:
+        yield path
+
+
+def is_url(source):
+    """Return True if the ffmpeg input is an HTTP(S) URL."""
+    return source.startswith(("http://", "https://"))
+
+
+def ffmpeg_input(source, *input_args):
+    """
+    Return the ffmpeg arguments that open source, with input_args
+    (e.g. -ss/-t) before -i and reconnects enabled for HTTP inputs.
+    """
+    http_args = []
+    if is_url(source):
+        http_args = ["-reconnect", "1", "-reconnect_on_network_error", "1",
+                     "-reconnect_delay_max", "5"]
+    return [*http_args, *input_args, "-i", source]
 
 
 def get_temp_file(suffix):
@@ -76,59 +193,143 @@ def cleanup_files(paths):
             os.unlink(path)
 
 
-def get_video_duration(path):
-    """Return video duration in seconds."""
-    clip = VideoFileClip(path)
-    return int(clip.duration)
+def run_ffprobe(source):
+    """Return ffprobe JSON output (format and streams) for a path or URL."""
+    result = subprocess.run([
+        "ffprobe", "-v", "error",
+        "-print_format", "json",
+        "-show_format", "-show_streams",
+        source
+    ], check=True, capture_output=True, text=True)
+    return json.loads(result.stdout)
+
+
+def get_stream(probe, codec_type):
+    """Return the first stream of the given type (empty dict if none)."""
+    for stream in probe.get("streams", []):
+        if stream.get("codec_type") == codec_type:
+            return stream
+    return {}
+
+
+def has_audio_stream(probe):
+    """Return True if the probed media contains at least one audio stream."""
+    return bool(get_stream(probe, "audio"))
+
+
+def source_has_audio(source, metadata=None):
+    """Return True if the source has an audio track, from stored metadata if available."""
+    if metadata and metadata.get("height"):
+        return bool(metadata["audio_codec"])
+    return has_audio_stream(run_ffprobe(source))
+
+
+def get_media_duration(probe):
+    """Return the container duration in seconds from ffprobe output."""
+    return float(probe.get("format", {}).get("duration", 0))
+
+
+def parse_frame_rate(rate):
+    """Return frames per second from an ffprobe rate like '30000/1001'."""
+    num, _, den = (rate or "").partition("/")
+    try:
+        fps = float(num) / float(den or 1)
+    except (ValueError, ZeroDivisionError):
+        return None
+    return round(fps, 3) or None
+
+
+def parse_int(value):
+    """Return value as int, or None if ffprobe did not report it."""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def extract_media_metadata(probe):
+    """Return the technical metadata stored on the Video model."""
+    video = get_stream(probe, "video")
+    audio = get_stream(probe, "audio")
+    fmt = probe.get("format", {})
+    return {
+        "duration": int(get_media_duration(probe)),
+        "width": video.get("width"),
+        "height": video.get("height"),
+        "fps": parse_frame_rate(video.get("avg_frame_rate")),
+        "video_codec": video.get("codec_name"),
+        "audio_codec": audio.get("codec_name"),
+        "bitrate": parse_int(fmt.get("bit_rate")),
+        "file_size": parse_int(fmt.get("size")),
+    }
+
+
+def probe_s3_video(video_s3_key):
+    """
+    Probe a video in S3 with ffprobe through a presigned URL, so only the
+    container header is fetched with range reads. Falls back to a full
+    download if the URL cannot be probed.
+    """
+    url = generate_presigned_url(video_s3_key, expiration=PROBE_URL_EXPIRATION)
+    if url:
+        try:
+            return run_ffprobe(url)
+        except (subprocess.CalledProcessError, ValueError) as e:
+            print(f"Error probing video URL, downloading instead: {e}")
+    with local_source(video_s3_key) as input_path:
+        return run_ffprobe(input_path)
 
 
-def update_video_duration(video_id, duration):
-    """Update duration field in Video model."""
-    Video.objects.filter(id=video_id).update(duration=duration)
+def get_video_metadata(video_id):
+    """Return the stored technical metadata of a Video, or None."""
+    if not video_id:
+        return None
+    return Video.objects.filter(id=video_id) \
+        .values(*MEDIA_METADATA_FIELDS).first()
 
 
-def set_video_duration(video_s3_key, video_id=None):
-    """Download video, get duration, and update Video model."""
-    temp_path = get_temp_file('.mp4')
+def set_video_metadata(video_s3_key, video_id=None):
+    """Probe video and store its technical metadata on the Video model in one write."""
     try:
-        if not download_from_s3(video_s3_key, temp_path):
-            return None
-        if video_id:
-            duration = get_video_duration(temp_path)
-            update_video_duration(video_id, duration)
-            return duration
+        probe = probe_s3_video(video_s3_key)
     except Exception:
         return None
-    finally:
-        cleanup_files([temp_path])
+    if not probe:
+        return None
+    metadata = extract_media_metadata(probe)
+    if video_id:
+        Video.objects.filter(id=video_id).update(**metadata)
+    return metadata
 
 
-@job('default')
+@job('media-light')
 def generate_thumbnail(video_s3_key, base_name):
-    """Generate thumbnail from video stored in S3/MinIO."""
-    temp_video_path = get_temp_file('.mp4')
-    temp_thumb_path = get_temp_file('.jpg')
-    try:
-        download_video_for_thumbnail(video_s3_key, temp_video_path)
-        create_thumbnail_with_ffmpeg(temp_video_path, temp_thumb_path)
+    """
+    Generate the thumbnail and its resized WebP/JPEG variants from one
+    extracted frame. Returns the Video fields to update.
+    """
+    with tempfile.TemporaryDirectory() as temp_dir:
+        temp_thumb_path = os.path.join(temp_dir, f"{base_name}.jpg")
+        with source_input(video_s3_key) as source:
+            create_thumbnail_with_ffmpeg(source, temp_thumb_path)
         thumb_s3_key = upload_thumbnail_and_return_key(
             temp_thumb_path, base_name)
-        return thumb_s3_key
-    finally:
-        cleanup_files([temp_video_path, temp_thumb_path])
-
+        variants = create_thumbnail_variants(
+            temp_thumb_path, temp_dir, base_name, settings.THUMBNAIL_WIDTHS)
+        return {
+            "thumbnail": thumb_s3_key,
+            "thumbnail_variants": upload_thumbnail_variants(variants),
+        }
 
-def download_video_for_thumbnail(video_s3_key, temp_video_path):
-    """Download video from S3 for thumbnail generation."""
-    if not download_from_s3(video_s3_key, temp_video_path):
-        raise Exception(f"Failed to download video from S3: {video_s3_key}")
 
-
-def create_thumbnail_with_ffmpeg(temp_video_path, temp_thumb_path):
-    """Generate thumbnail using ffmpeg."""
+def create_thumbnail_with_ffmpeg(source, temp_thumb_path):
+    """
+    Generate thumbnail using ffmpeg. Seeking before -i means only the data
+    around the frame is read, which for a URL is a few range requests.
+    """
     subprocess.run([
-        'ffmpeg', '-i', temp_video_path,
-        '-ss', '00:00:01',
+        'ffmpeg', *ffmpeg_input(source, '-threads', str(THUMBNAIL_THREADS),
+                                '-ss', '00:00:01'),
         '-vframes', '1',
         '-y',
         temp_thumb_path
@@ -143,122 +344,970 @@ def upload_thumbnail_and_return_key(temp_thumb_path, base_name):
     return thumb_s3_key
 
 
+def get_variant_widths(source_width, widths):
+    """
+    Return the requested widths that do not upscale the frame,
+    or the frame width itself if it is smaller than all of them.
+    """
+    fitting = sorted(w for w in widths if w <= source_width)
+    return fitting or [source_width]
+
+
+def create_thumbnail_variants(frame_path, output_dir, base_name, widths):
+    """
+    Resize the decoded frame once per width and save it in every
+    THUMBNAIL_FORMATS format. Returns (format, width, path) tuples.
+    """
+    variants = []
+    with Image.open(frame_path) as frame:
+        frame = frame.convert("RGB")
+        for width in get_variant_widths(frame.width, widths):
+            height = max(1, round(frame.height * width / frame.width))
+            resized = frame.resize((width, height), Image.LANCZOS)
+            for fmt, (pil_format, ext, options) in THUMBNAIL_FORMATS.items():
+                path = os.path.join(output_dir, f"{base_name}_{width}w{ext}")
+                resized.save(path, pil_format, **options)
+                variants.append((fmt, width, path))
+    return variants
+
+
+def upload_thumbnail_variants(variants):
+    """
+    Upload thumbnail variants concurrently and return their keys
+    as {format: {width: key}}. Raises if any upload failed.
+    """
+    files = [(path, f"thumbnails/{os.path.basename(path)}")
+             for _, _, path in variants]
+    report = s3_transfer.bulk_upload(
+        get_s3_client(), settings.AWS_STORAGE_BUCKET_NAME, files,
+        max_workers=settings.S3_UPLOAD_WORKERS,
+        retries=settings.S3_UPLOAD_RETRIES)
+    if report["failed"]:
+        raise Exception(
+            f"Failed to upload thumbnail variants: {sorted(report['failed'])}")
+    keys = {}
+    for (fmt, width, _), (_, s3_key) in zip(variants, files):
+        keys.setdefault(fmt, {})[str(width)] = s3_key
+    return keys
+
+
+def get_thumbnail_variant_keys(thumbnail_variants):
+    """Return all S3 keys of a thumbnail_variants map."""
+    return [s3_key for by_width in (thumbnail_variants or {}).values()
+            for s3_key in by_width.values()]
+
+
 def get_output_path(output_dir, base_name, height):
     """Return output path for HLS playlist for the given height."""
     return os.path.join(output_dir, f"{base_name}_{height}p.m3u8")
 
 
-def get_encoding_params(height):
-    """Return bitrate, maxrate and bufsize for the given height."""
+def get_encoding_params(height, complexity=1.0):
+    """
+    Return bitrate, maxrate and bufsize for the given height,
+    scaled by the content complexity factor of the source.
+    """
     bitrate_map = {120: 100, 360: 600, 720: 1800, 1080: 3500}
     maxrate_map = {120: 150, 360: 900, 720: 2500, 1080: 5000}
     bufsize_map = {120: 300, 360: 1800, 720: 5000, 1080: 10000}
     bitrate = bitrate_map.get(height, 1000)
     maxrate = maxrate_map.get(height, 1200)
     bufsize = bufsize_map.get(height, 2000)
+    if complexity != 1.0:
+        return (int(bitrate * complexity), int(maxrate * complexity),
+                int(bufsize * complexity))
     return bitrate, maxrate, bufsize
 
 
-def run_ffmpeg_hls(input_path, output_path, output_dir, base_name, height,
-                   bitrate, maxrate, bufsize):
-    """Run ffmpeg command to generate HLS stream for given resolution."""
-    segment_template = os.path.join(
-        output_dir, f"{base_name}_{height}p_%03d.ts")
-    subprocess.run([
-        "ffmpeg", "-i", input_path,
-        "-vf", f"scale=-2:{height}",
-        "-c:a", "aac", "-ar", "48000", "-b:a", "128k",
+def get_audio_codec_args():
+    """Return ffmpeg arguments for the AAC audio encode."""
+    return ["-c:a", "aac", "-ar", "48000", "-b:a", f"{AUDIO_BITRATE_KBPS}k"]
+
+
+def uses_shared_audio():
+    """
+    Return True if audio is encoded once into its own rendition and
+    referenced from the master playlist via EXT-X-MEDIA (HLS_SHARED_AUDIO).
+    """
+    return settings.HLS_SHARED_AUDIO
+
+
+def get_rendition_audio_args():
+    """Return the audio arguments of a video rendition encoded on its own."""
+    if uses_shared_audio():
+        return ["-an"]
+    return get_audio_codec_args()
+
+
+def get_video_codec_args(threads=None):
+    """
+    Return ffmpeg arguments for the H.264 video encode shared by all heights,
+    limited to threads encoder threads per stream if given.
+    """
+    args = [
         "-c:v", "h264", "-profile:v", "main", "-crf", "20",
+        "-preset", settings.TRANSCODE_PRESET,
         "-sc_threshold", "0", "-g", "48", "-keyint_min", "48",
-        "-hls_time", "10", "-hls_playlist_type", "vod",
-        "-b:v", f"{bitrate}k", "-maxrate", f"{maxrate}k", "-bufsize", f"{bufsize}k",
-        "-hls_segment_filename", segment_template,
-        output_path
-    ], check=True)
+    ]
+    if threads:
+        args += ["-threads", str(threads)]
+    return args
+
+
+def get_decoder_args(threads):
+    """Return the input arguments limiting the decoder to threads."""
+    return ["-threads", str(threads)]
+
+
+def uses_single_file_segments():
+    """Return True if each rendition is one media file addressed by byte ranges."""
+    return settings.HLS_SINGLE_FILE
 
 
-def transcode_to_hls(input_path, output_dir, base_name, height):
+def uses_streaming_uploads():
+    """
+    Return True if segments are uploaded while ffmpeg encodes. A single-file
+    rendition only becomes complete at the end, so it is uploaded afterwards.
+    """
+    return settings.HLS_STREAM_UPLOADS and not uses_single_file_segments()
+
+
+def get_hls_flags():
+    """Return the -hls_flags values for the current upload and packaging mode."""
+    flags = []
+    if uses_single_file_segments():
+        flags.append("single_file")
+    elif uses_streaming_uploads():
+        flags.append("temp_file")
+    return flags
+
+
+def uses_fmp4_segments():
+    """Return True if HLS output is packaged as CMAF/fMP4 (HLS_SEGMENT_FORMAT)."""
+    return settings.HLS_SEGMENT_FORMAT == "fmp4"
+
+
+def get_segment_extension():
+    """Return the file extension of the media segments."""
+    return ".m4s" if uses_fmp4_segments() else ".ts"
+
+
+def get_segment_template(output_dir, base_name, variant):
+    """
+    Return the -hls_segment_filename pattern for a variant ('720p' or '%v').
+    In single-file mode this is the one media file of the rendition.
+    """
+    if uses_single_file_segments():
+        return os.path.join(
+            output_dir, f"{base_name}_{variant}{get_segment_extension()}")
+    return os.path.join(
+        output_dir, f"{base_name}_{variant}_%03d{get_segment_extension()}")
+
+
+def get_hls_args(base_name, variant):
+    """
+    Return ffmpeg arguments for the HLS muxer. In fMP4 mode every variant
+    gets an init segment next to its playlist, named after the variant.
+    """
+    args = ["-hls_time", "10", "-hls_playlist_type", "vod"]
+    if uses_fmp4_segments():
+        args += ["-hls_segment_type", "fmp4",
+                 "-hls_fmp4_init_filename", f"{base_name}_{variant}_init.mp4"]
+    flags = get_hls_flags()
+    if flags:
+        args += ["-hls_flags", "+".join(flags)]
+    return args
+
+
+def run_ffmpeg_hls(input_path, output_path, output_dir, base_name, height,
+                   bitrate, maxrate, bufsize, input_args=(), output_args=()):
+    """
+    Run ffmpeg command to generate HLS stream for given resolution.
+    input_args are placed before -i (e.g. -ss/-t), output_args before the output.
+    The encode waits for a transcode slot of the host and uses its thread budget.
+    """
+    variant = f"{height}p"
+    segment_template = get_segment_template(output_dir, base_name, variant)
+    threads = admission.get_thread_budget()
+    with admission.slot():
+        progress.run_ffmpeg([
+            "ffmpeg", *ffmpeg_input(input_path, *get_decoder_args(threads),
+                                    *input_args),
+            "-vf", f"scale=-2:{height}",
+            *get_rendition_audio_args(),
+            *get_video_codec_args(threads),
+            *get_hls_args(base_name, variant),
+            "-b:v", f"{bitrate}k", "-maxrate", f"{maxrate}k",
+            "-bufsize", f"{bufsize}k",
+            "-hls_segment_filename", segment_template,
+            *output_args,
+            output_path
+        ])
+
+
+def select_ladder_heights(source_height, heights=DEFAULT_LADDER_HEIGHTS):
+    """
+    Return the ladder heights that do not upscale the source.
+    The lowest rung is always kept so every video gets a rendition.
+    """
+    if not source_height:
+        return list(heights)
+    selected = [h for h in heights if h <= source_height]
+    return selected or [min(heights)]
+
+
+def measure_complexity(source, duration):
+    """
+    Encode a short sample from the middle of the source at a fixed CRF and
+    return its bitrate relative to COMPLEXITY_REFERENCE_KBPS (clamped).
+    Static content yields a low factor, high-motion content a high one.
+    The sample encode waits for a transcode slot and uses its thread budget.
+    """
+    sample_seconds = min(COMPLEXITY_SAMPLE_SECONDS, duration) or \
+        COMPLEXITY_SAMPLE_SECONDS
+    start = max(0, duration / 2 - sample_seconds / 2)
+    temp_sample_path = get_temp_file('.mp4')
+    threads = admission.get_thread_budget()
+    try:
+        with admission.slot():
+            subprocess.run([
+                "ffmpeg",
+                *ffmpeg_input(source, *get_decoder_args(threads),
+                              "-ss", f"{start:.3f}",
+                              "-t", f"{sample_seconds:.3f}"),
+                "-an", "-vf", "scale=-2:360",
+                "-c:v", "h264", "-preset", "ultrafast", "-crf", "23",
+                "-threads", str(threads),
+                "-y", temp_sample_path
+            ], check=True, capture_output=True)
+        kbps = os.path.getsize(temp_sample_path) * 8 / 1000 / sample_seconds
+    finally:
+        cleanup_files([temp_sample_path])
+    factor = kbps / COMPLEXITY_REFERENCE_KBPS
+    return round(min(max(factor, COMPLEXITY_MIN), COMPLEXITY_MAX), 2)
+
+
+def plan_encoding_ladder(source, metadata=None):
+    """
+    Return the heights to encode and the complexity factor for their bitrates
+    (1.0 unless HLS_COMPLEXITY_ANALYSIS is on). Uses the stored metadata
+    and only probes the source if it has not been probed yet.
+    """
+    if not metadata or not metadata.get("height"):
+        metadata = extract_media_metadata(run_ffprobe(source))
+    heights = select_ladder_heights(metadata.get("height"))
+    complexity = 1.0
+    if settings.HLS_COMPLEXITY_ANALYSIS:
+        complexity = measure_complexity(source, metadata.get("duration") or 0)
+    return heights, complexity
+
+
+def build_split_filter(heights, trickplay=False):
+    """
+    Return a filtergraph that decodes the video once and scales
+    one output per height, labelled [v0out], [v1out], ...
+    With trickplay an extra [vtout] branch produces the sprite sheets.
+    """
+    outputs = len(heights) + (1 if trickplay else 0)
+    labels = "".join(f"[v{i}]" for i in range(len(heights)))
+    scales = [f"[v{i}]scale=-2:{h}[v{i}out]" for i, h in enumerate(heights)]
+    if trickplay:
+        labels += "[vt]"
+        scales.append(f"[vt]{get_trickplay_filter()}[vtout]")
+    return ";".join([f"[0:v]split={outputs}{labels}"] + scales)
+
+
+def build_variant_args(heights, with_audio, complexity=1.0):
+    """
+    Return the per-variant map/bitrate arguments and the var_stream_map
+    value naming every variant '<height>p'. With shared audio the audio is
+    mapped once into an 'audio' rendition of the audio group instead of
+    being muxed into every variant.
+    """
+    shared_audio = with_audio and uses_shared_audio()
+    args, stream_map = [], []
+    for i, h in enumerate(heights):
+        bitrate, maxrate, bufsize = get_encoding_params(h, complexity)
+        args += [
+            "-map", f"[v{i}out]",
+            f"-b:v:{i}", f"{bitrate}k",
+            f"-maxrate:v:{i}", f"{maxrate}k",
+            f"-bufsize:v:{i}", f"{bufsize}k",
+        ]
+        if shared_audio:
+            stream_map.append(f"v:{i},agroup:{AUDIO_GROUP_ID},name:{h}p")
+        elif with_audio:
+            args += ["-map", "0:a:0"]
+            stream_map.append(f"v:{i},a:{i},name:{h}p")
+        else:
+            stream_map.append(f"v:{i},name:{h}p")
+    if shared_audio:
+        args += ["-map", "0:a:0"]
+        stream_map.append(
+            f"a:0,agroup:{AUDIO_GROUP_ID},name:{AUDIO_RENDITION}")
+    return args, " ".join(stream_map)
+
+
+def run_ffmpeg_hls_multi(input_path, output_dir, base_name, heights,
+                         with_audio, complexity=1.0, trickplay=False):
+    """
+    Run a single ffmpeg command that decodes the input once and writes
+    every variant playlist plus the master playlist (and the trickplay
+    sprite sheets as a second output). The thread budget of its transcode
+    slot is split across the variant encoders. With HLS_PROGRESSIVE no
+    master is written, so uploading the output directory cannot replace
+    the master already published for the first rendition.
+    """
+    variant_args, stream_map = build_variant_args(
+        heights, with_audio, complexity)
+    master_args = []
+    if not settings.HLS_PROGRESSIVE:
+        master_args = ["-master_pl_name", f"{base_name}_master.m3u8"]
+    trickplay_args = []
+    if trickplay:
+        trickplay_args = ["-map", "[vtout]",
+                          *get_trickplay_output_args(output_dir, base_name)]
+    threads = admission.get_thread_budget()
+    with admission.slot():
+        progress.run_ffmpeg([
+            "ffmpeg", *ffmpeg_input(input_path, *get_decoder_args(threads)),
+            "-filter_complex", build_split_filter(heights, trickplay),
+            *variant_args,
+            *get_audio_codec_args(),
+            *get_video_codec_args(max(1, threads // len(heights))),
+            "-f", "hls", *get_hls_args(base_name, "%v"),
+            "-hls_segment_filename",
+            get_segment_template(output_dir, base_name, "%v"),
+            *master_args,
+            "-var_stream_map", stream_map,
+            os.path.join(output_dir, f"{base_name}_%v.m3u8"),
+            *trickplay_args
+        ])
+
+
+def get_trickplay_filter():
+    """Return the filter that samples one frame per interval into tiled sheets."""
+    return (f"fps=1/{TRICKPLAY_INTERVAL},scale={TRICKPLAY_WIDTH}:-2,"
+            f"tile={TRICKPLAY_COLUMNS}x{TRICKPLAY_ROWS}")
+
+
+def get_trickplay_output_args(output_dir, base_name):
+    """Return ffmpeg output arguments for the JPEG sprite sheets."""
+    return ["-qscale:v", "5",
+            os.path.join(output_dir, f"{base_name}_sprite_%03d.jpg")]
+
+
+def create_trickplay_with_ffmpeg(source, output_dir, base_name):
+    """Generate trickplay sprite sheets in a separate ffmpeg pass."""
+    os.makedirs(output_dir, exist_ok=True)
+    threads = admission.get_thread_budget()
+    with admission.slot():
+        progress.run_ffmpeg([
+            "ffmpeg", *ffmpeg_input(source, *get_decoder_args(threads)),
+            "-an", "-vf", get_trickplay_filter(),
+            *get_trickplay_output_args(output_dir, base_name)
+        ])
+
+
+def list_sprite_sheets(output_dir, base_name):
+    """Return the sprite sheet file names in order."""
+    prefix = f"{base_name}_sprite_"
+    return sorted(fname for fname in os.listdir(output_dir)
+                  if fname.startswith(prefix) and fname.endswith(".jpg"))
+
+
+def format_vtt_timestamp(seconds):
+    """Return seconds as a WebVTT timestamp (HH:MM:SS.mmm)."""
+    millis = int(round(seconds * 1000))
+    hours, millis = divmod(millis, 3600000)
+    minutes, millis = divmod(millis, 60000)
+    secs, millis = divmod(millis, 1000)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d}.{millis:03d}"
+
+
+def write_trickplay_vtt(output_dir, base_name, duration):
+    """
+    Write a WebVTT track mapping every TRICKPLAY_INTERVAL to its tile
+    (#xywh) in the sprite sheets, signed unless they are signed per
+    request. Returns the path or None.
+    """
+    sprites = list_sprite_sheets(output_dir, base_name)
+    if not sprites:
+        return None
+    with Image.open(os.path.join(output_dir, sprites[0])) as sheet:
+        tile_w = sheet.width // TRICKPLAY_COLUMNS
+        tile_h = sheet.height // TRICKPLAY_ROWS
+    per_sheet = TRICKPLAY_COLUMNS * TRICKPLAY_ROWS
+    count = len(sprites) * per_sheet
+    if duration:
+        count = min(count, math.ceil(duration / TRICKPLAY_INTERVAL))
+    sprite_uris = {fname: get_playlist_uri(base_name, fname)
+                   for fname in sprites}
+
+    lines = ["WEBVTT", ""]
+    for i in range(count):
+        start = i * TRICKPLAY_INTERVAL
+        end = start + TRICKPLAY_INTERVAL
+        if duration:
+            end = min(end, duration)
+        position = i % per_sheet
+        x = position % TRICKPLAY_COLUMNS * tile_w
+        y = position // TRICKPLAY_COLUMNS * tile_h
+        url = sprite_uris[sprites[i // per_sheet]]
+        lines += [
+            f"{format_vtt_timestamp(start)} --> {format_vtt_timestamp(end)}",
+            f"{url}#xywh={x},{y},{tile_w},{tile_h}",
+            "",
+        ]
+    vtt_path = os.path.join(output_dir, f"{base_name}_thumbnails.vtt")
+    with open(vtt_path, "w") as f:
+        f.write("\n".join(lines))
+    return vtt_path
+
+
+def get_variant_names(heights, shared_audio=False):
+    """Return the rendition names ('<height>p' and 'audio') of a ladder."""
+    names = [f"{h}p" for h in heights]
+    if shared_audio:
+        names.append(AUDIO_RENDITION)
+    return names
+
+
+def transcode_audio_to_hls(input_path, output_dir, base_name,
+                           input_args=(), output_args=()):
+    """
+    Encode the audio track once into the audio-only HLS rendition
+    shared by all video variants. The encode waits for a transcode slot
+    of the host and uses its thread budget.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    output_path = os.path.join(
+        output_dir, f"{base_name}_{AUDIO_RENDITION}.m3u8")
+    threads = admission.get_thread_budget()
+    with admission.slot():
+        progress.run_ffmpeg([
+            "ffmpeg", *ffmpeg_input(input_path, *get_decoder_args(threads),
+                                    *input_args),
+            "-map", "0:a:0", "-vn",
+            *get_audio_codec_args(),
+            "-threads", str(threads),
+            *get_hls_args(base_name, AUDIO_RENDITION),
+            "-hls_segment_filename",
+            get_segment_template(output_dir, base_name, AUDIO_RENDITION),
+            *output_args,
+            output_path
+        ])
+    return output_path
+
+
+def transcode_to_hls(input_path, output_dir, base_name, height,
+                     input_args=(), output_args=(), complexity=1.0):
     """
     Transcode input video to HLS (.m3u8 + .ts) for one resolution height.
     """
     os.makedirs(output_dir, exist_ok=True)
     output_path = get_output_path(output_dir, base_name, height)
-    bitrate, maxrate, bufsize = get_encoding_params(height)
+    bitrate, maxrate, bufsize = get_encoding_params(height, complexity)
     run_ffmpeg_hls(input_path, output_path, output_dir, base_name, height,
-                   bitrate, maxrate, bufsize)
+                   bitrate, maxrate, bufsize,
+                   input_args=input_args, output_args=output_args)
     return output_path
 
 
 def create_master_playlist(output_dir, base_name, heights):
     """
-    Create a master HLS playlist referencing all variant playlists.
+    Create a master HLS playlist referencing all variant playlists,
+    with the variants measured from the local output.
     """
     master_path = os.path.join(output_dir, f"{base_name}_master.m3u8")
     with open(master_path, "w") as f:
         f.write("#EXTM3U\n")
         for h in heights:
-            f.write(
-                f'#EXT-X-STREAM-INF:BANDWIDTH={h*1000*2},RESOLUTION=1920x{h}\n')
+            variant = measure_variant(output_dir, base_name, f"{h}p")
+            f.write(f"#EXT-X-STREAM-INF:{format_stream_inf(variant)}\n")
             f.write(f"{base_name}_{h}p.m3u8\n")
     return master_path
 
 
 def sign_ts_segment_urls(playlist_path, base_name):
     """
-    Replace all .ts segment paths in a playlist with signed S3 URLs.
+    Replace all segment paths (.ts or .m4s) and EXT-X-MAP init segment
+    URIs in a playlist with signed S3 URLs. Each file is signed once, so a
+    single-file rendition with EXT-X-BYTERANGE costs one signature.
     """
 
     with open(playlist_path, "r") as f:
-        lines = f.readlines()
-
-    signed_lines = []
-    for line in lines:
-        if line.strip().endswith(".ts"):
-            s3_key = f"hls/{base_name}/{line.strip()}"
-            signed_url = generate_presigned_url(s3_key)
-            signed_lines.append(signed_url + "\n")
-        else:
-            signed_lines.append(line)
+        text = f.read()
+
+    signed_urls = {}
+
+    def sign(fname):
+        if fname not in signed_urls:
+            signed_urls[fname] = generate_presigned_url(
+                f"hls/{base_name}/{fname}")
+        return signed_urls[fname]
 
     with open(playlist_path, "w") as f:
-        f.writelines(signed_lines)
+        f.write(playlists.rewrite_uris(text, sign))
 
 
-def create_signed_master_playlist(output_dir, base_name, heights):
+def uses_request_time_signing():
     """
-    Create a master HLS playlist with signed URLs for each resolution playlist.
+    Return True if playlists are stored as unsigned templates and signed
+    per request by the playlist endpoint (HLS_REQUEST_TIME_SIGNING).
+    """
+    return settings.HLS_REQUEST_TIME_SIGNING
+
+
+def get_playlist_uri(base_name, fname):
+    """
+    Return the URI of an HLS file referenced by a stored playlist, DASH
+    manifest or trickplay track: the bare file name for request-time
+    signing, otherwise a signed URL.
+    """
+    if uses_request_time_signing():
+        return fname
+    return generate_presigned_url(get_hls_key(base_name, fname))
+
+
+def create_signed_master_playlist(output_dir, base_name, heights,
+                                  shared_audio=False):
+    """
+    Create a master HLS playlist with signed URLs for each resolution
+    playlist, or bare file names when they are signed per request.
+    With shared audio the audio rendition is declared once as an EXT-X-MEDIA
+    group that every variant references. The variant attributes are
+    measured from the uploaded renditions.
     """
     master_path = os.path.join(output_dir, f"{base_name}_master.m3u8")
+    object_sizes = list_hls_object_sizes(base_name)
+    audio, audio_attribute = None, ""
     with open(master_path, "w") as f:
         f.write("#EXTM3U\n")
+        if shared_audio:
+            audio = measure_variant(output_dir, base_name, AUDIO_RENDITION,
+                                    object_sizes)
+            audio_url = get_playlist_uri(
+                base_name, f"{base_name}_{AUDIO_RENDITION}.m3u8")
+            f.write(f'#EXT-X-MEDIA:TYPE=AUDIO,GROUP-ID="{AUDIO_GROUP_ID}",'
+                    f'NAME="{AUDIO_RENDITION}",DEFAULT=YES,AUTOSELECT=YES,'
+                    f'URI="{audio_url}"\n')
+            audio_attribute = f',AUDIO="{AUDIO_GROUP_ID}"'
         for h in heights:
-            s3_key = f"hls/{base_name}/{base_name}_{h}p.m3u8"
-            signed_url = generate_presigned_url(s3_key)
-            f.write(
-                f'#EXT-X-STREAM-INF:BANDWIDTH={h*1000*2},RESOLUTION=1920x{h}\n')
-            f.write(f"{signed_url}\n")
+            variant_url = get_playlist_uri(base_name, f"{base_name}_{h}p.m3u8")
+            variant = measure_variant(output_dir, base_name, f"{h}p",
+                                      object_sizes)
+            f.write(f"#EXT-X-STREAM-INF:{format_stream_inf(variant, audio)}"
+                    f"{audio_attribute}\n")
+            f.write(f"{variant_url}\n")
     return master_path
 
 
-def transcode_all_heights(input_path, output_dir, base_name, heights):
-    """Transcode video to HLS for all requested heights."""
-    for h in heights:
-        transcode_to_hls(input_path, output_dir, base_name, h)
+def get_variant_bandwidth(name):
+    """Return the nominal bandwidth (bits/s) of a variant ('720p' or 'audio')."""
+    if name == AUDIO_RENDITION:
+        return AUDIO_BITRATE_KBPS * 1000
+    return int(name[:-1]) * 1000 * 2
+
+
+def list_hls_object_sizes(base_name):
+    """Return {file name: size} of all HLS files of a video in S3."""
+    try:
+        return {
+            os.path.basename(obj["Key"]): obj["Size"]
+            for obj in s3_transfer.iter_objects(
+                get_s3_client(), settings.AWS_STORAGE_BUCKET_NAME,
+                f"hls/{base_name}/")
+        }
+    except (ClientError, NoCredentialsError) as e:
+        print(f"Error listing HLS files of {base_name}: {e}")
+        return {}
+
+
+def get_segment_size(output_dir, uri, byterange, object_sizes):
+    """Return the size of a segment from its byte range, local file or S3 listing."""
+    if byterange:
+        return byterange[0]
+    fname = os.path.basename(urlparse(uri).path)
+    path = os.path.join(output_dir, fname)
+    if os.path.exists(path):
+        return os.path.getsize(path)
+    return object_sizes.get(fname)
+
+
+def read_hls_bytes(output_dir, base_name, uri, byterange=None):
+    """
+    Return the bytes of an HLS file, or only the (length, offset) byterange,
+    from output_dir or with a (ranged) GET from S3.
+    """
+    fname = os.path.basename(urlparse(uri).path)
+    path = os.path.join(output_dir, fname)
+    if os.path.exists(path):
+        with open(path, "rb") as f:
+            if byterange:
+                f.seek(byterange[1])
+                return f.read(byterange[0])
+            return f.read()
+    kwargs = {}
+    if byterange:
+        kwargs["Range"] = f"bytes={dash_manifest.format_range(byterange)}"
+    response = get_s3_client().get_object(
+        Bucket=settings.AWS_STORAGE_BUCKET_NAME,
+        Key=get_hls_key(base_name, fname), **kwargs)
+    return response["Body"].read()
+
+
+def read_media_header(output_dir, base_name, run):
+    """
+    Return the start of a rendition's media: its fMP4 init segment (if
+    any) followed by the first MEDIA_HEADER_BYTES of its first segment.
+    """
+    header = b""
+    if run["init"]:
+        header = read_hls_bytes(output_dir, base_name, run["init"],
+                                run["init_range"])
+    _, uri, byterange = run["segments"][0]
+    length, offset = byterange or (MEDIA_HEADER_BYTES, 0)
+    return header + read_hls_bytes(output_dir, base_name, uri,
+                                   (min(length, MEDIA_HEADER_BYTES), offset))
+
+
+def probe_media_header(output_dir, base_name, run):
+    """
+    Return the ffprobe output of the start of a rendition's media, or an
+    empty dict if it cannot be read or probed.
+    """
+    _, uri, _ = run["segments"][0]
+    suffix = os.path.splitext(urlparse(uri).path)[1]
+    try:
+        with tempfile.NamedTemporaryFile(suffix=suffix) as f:
+            f.write(read_media_header(output_dir, base_name, run))
+            f.flush()
+            return run_ffprobe(f.name)
+    except (ClientError, NoCredentialsError, subprocess.CalledProcessError,
+            OSError, ValueError) as e:
+        print(f"Error probing HLS media of {base_name}: {e}")
+        return {}
+
+
+def get_avc_codec(stream):
+    """
+    Return the RFC 6381 codec (avc1.PPCCLL) of an ffprobe H.264 stream from
+    its profile and level, or None for an unknown profile.
+    """
+    prefix = AVC_PROFILE_PREFIXES.get(stream.get("profile"))
+    level = parse_int(stream.get("level"))
+    if prefix is None or level is None:
+        return None
+    return f"avc1.{prefix}{level:02x}"
+
+
+def describe_media(probe):
+    """
+    Return the codecs (RFC 6381 list), width, height and frame rate of a
+    rendition from the ffprobe output of its media.
+    """
+    video = get_stream(probe, "video")
+    audio = get_stream(probe, "audio")
+    codecs = []
+    video_codec = video.get("codec_name") == "h264" and get_avc_codec(video)
+    if video_codec:
+        codecs.append(video_codec)
+    if audio.get("codec_name") == "aac":
+        codecs.append(AAC_PROFILE_CODECS.get(
+            audio.get("profile"), dash_manifest.AAC_LC_CODEC))
+    return {
+        "codecs": codecs,
+        "width": video.get("width"),
+        "height": video.get("height"),
+        "frame_rate": parse_frame_rate(video.get("r_frame_rate")),
+    }
+
+
+def measure_variant(output_dir, base_name, name, object_sizes=None):
+    """
+    Measure a finished rendition ('720p' or 'audio') from its output: the
+    peak segment bitrate and average bitrate from the playlist durations
+    and segment sizes, and codecs, dimensions and frame rate from ffprobe
+    on the start of its media. Bitrates that cannot be measured fall back
+    to the nominal bandwidth.
+    """
+    runs = dash_manifest.parse_media_playlist(ensure_hls_file(
+        output_dir, base_name, f"{base_name}_{name}.m3u8"))
+    segments = [segment for run in runs for segment in run["segments"]]
+    bandwidth, average_bandwidth = stream_info.measure_bitrates([
+        (duration, get_segment_size(output_dir, uri, byterange,
+                                    object_sizes or {}))
+        for duration, uri, byterange in segments])
+    variant = {
+        "bandwidth": bandwidth or get_variant_bandwidth(name),
+        "average_bandwidth": average_bandwidth,
+        "codecs": [],
+    }
+    if segments:
+        variant.update(describe_media(
+            probe_media_header(output_dir, base_name, runs[0])))
+    return variant
+
+
+def format_stream_inf(variant, audio=None):
+    """
+    Return the EXT-X-STREAM-INF attributes of a measured variant. A shared
+    audio rendition adds its bitrates and codec, since BANDWIDTH covers
+    every rendition a player loads for the variant.
+    """
+    bandwidth = variant["bandwidth"]
+    average_bandwidth = variant["average_bandwidth"]
+    codecs = list(variant["codecs"])
+    if audio:
+        bandwidth += audio["bandwidth"]
+        if average_bandwidth and audio["average_bandwidth"]:
+            average_bandwidth += audio["average_bandwidth"]
+        codecs += [codec for codec in audio["codecs"] if codec not in codecs]
+    attributes = [f"BANDWIDTH={bandwidth}"]
+    if average_bandwidth:
+        attributes.append(f"AVERAGE-BANDWIDTH={average_bandwidth}")
+    if variant.get("width") and variant.get("height"):
+        attributes.append(
+            f"RESOLUTION={variant['width']}x{variant['height']}")
+    if codecs:
+        attributes.append(f'CODECS="{",".join(codecs)}"')
+    if variant.get("frame_rate"):
+        attributes.append(f"FRAME-RATE={variant['frame_rate']:.3f}")
+    return ",".join(attributes)
+
+
+def ensure_hls_file(output_dir, base_name, fname):
+    """Return the local path of an HLS file, downloading it if missing."""
+    path = os.path.join(output_dir, fname)
+    if not os.path.exists(path):
+        s3_key = get_hls_key(base_name, fname)
+        if not download_from_s3(s3_key, path):
+            raise Exception(f"Failed to download HLS file: {s3_key}")
+    return path
+
+
+def load_init_segment(output_dir, base_name, run):
+    """
+    Return the local path and byte range of the init segment of a playlist
+    run. For a single-file rendition that is not on disk only the init
+    bytes are fetched with a ranged GET.
+    """
+    init_name = os.path.basename(urlparse(run["init"]).path)
+    path = os.path.join(output_dir, init_name)
+    if os.path.exists(path) or not run["init_range"]:
+        return ensure_hls_file(output_dir, base_name, init_name), run["init_range"]
+    response = get_s3_client().get_object(
+        Bucket=settings.AWS_STORAGE_BUCKET_NAME,
+        Key=get_hls_key(base_name, init_name),
+        Range=f"bytes={dash_manifest.format_range(run['init_range'])}")
+    init_path = f"{path}.init"
+    with open(init_path, "wb") as f:
+        f.write(response["Body"].read())
+    return init_path, None
+
+
+def create_signed_dash_manifest(output_dir, base_name, heights,
+                                shared_audio=False):
+    """
+    Write a DASH manifest that references the same fMP4 init segments and
+    fragments as the variant playlists: bare file names signed per request
+    by the manifest endpoint, or the signed URLs of the playlists.
+    A shared audio rendition becomes its own audio adaptation set and
+    every bandwidth is the measured peak segment bitrate.
+    """
+    representations = []
+    object_sizes = list_hls_object_sizes(base_name)
+    for name in get_variant_names(heights, shared_audio):
+        playlist_path = ensure_hls_file(
+            output_dir, base_name, f"{base_name}_{name}.m3u8")
+        runs = dash_manifest.parse_media_playlist(playlist_path)
+        representation = {
+            "id": name,
+            "codecs": dash_manifest.get_init_codecs(
+                *load_init_segment(output_dir, base_name, runs[0])),
+            "runs": runs,
+            "bandwidth": measure_variant(
+                output_dir, base_name, name, object_sizes)["bandwidth"],
+        }
+        if name == AUDIO_RENDITION:
+            representation.update(mime_type="audio/mp4")
+        else:
+            representation.update(mime_type="video/mp4", height=int(name[:-1]))
+        representations.append(representation)
+    mpd_path = os.path.join(output_dir, f"{base_name}_manifest.mpd")
+    with open(mpd_path, "w") as f:
+        f.write(dash_manifest.build_mpd(representations))
+    return mpd_path
+
 
+def probe_keyframe_times(source):
+    """
+    Return the sorted presentation times (seconds) of all video keyframes.
+    Reads packet flags only, no frames are decoded.
+    """
+    result = subprocess.run([
+        "ffprobe", "-v", "error", "-select_streams", "v:0",
+        "-show_entries", "packet=pts_time,flags",
+        "-of", "csv=p=0", source
+    ], check=True, capture_output=True, text=True)
+    times = []
+    for line in result.stdout.splitlines():
+        pts_time, _, flags = line.partition(",")
+        if "K" in flags and pts_time not in ("", "N/A"):
+            times.append(float(pts_time))
+    return sorted(times)
+
+
+def plan_chunks(keyframe_times, duration, chunk_seconds):
+    """
+    Split [0, duration) into (start, end) ranges that start on keyframes
+    and last at least chunk_seconds. A short tail is merged into the last chunk.
+    """
+    starts = [0.0]
+    for t in keyframe_times:
+        long_enough = t - starts[-1] >= chunk_seconds
+        if long_enough and duration - t >= chunk_seconds / 4:
+            starts.append(t)
+    return list(zip(starts, starts[1:] + [duration]))
 
-def sign_all_variant_playlists(output_dir, base_name, heights):
-    """Sign all variant .m3u8 playlists with temporary URLs."""
-    for h in heights:
-        path = os.path.join(output_dir, f"{base_name}_{h}p.m3u8")
+
+def get_chunk_name(base_name, index):
+    """Return the base name used for the files of one chunk."""
+    return f"{base_name}_chunk{index:04d}"
+
+
+def stitch_playlists(chunk_playlist_paths, output_path):
+    """
+    Concatenate the segments of chunk playlists (in order) into one VOD playlist.
+    fMP4 chunks keep their own EXT-X-MAP init segment and single-file
+    chunks their EXT-X-BYTERANGE tags.
+    """
+    target_duration, entries, version = 0, [], 3
+    for path in chunk_playlist_paths:
+        with open(path, "r") as f:
+            lines = f.read().splitlines()
+        for i, line in enumerate(lines):
+            if line.startswith("#EXT-X-TARGETDURATION:"):
+                target_duration = max(target_duration, int(line.split(":")[1]))
+            elif line.startswith("#EXT-X-MAP:"):
+                entries.append(line)
+                version = 7
+            elif line.startswith("#EXT-X-BYTERANGE:"):
+                entries.append(line)
+                version = max(version, 4)
+            elif line.startswith("#EXTINF:"):
+                entries.append(line)
+            elif line and not line.startswith("#"):
+                entries.append(line)
+    with open(output_path, "w") as f:
+        f.write(f"#EXTM3U\n#EXT-X-VERSION:{version}\n")
+        f.write(f"#EXT-X-TARGETDURATION:{target_duration}\n")
+        f.write("#EXT-X-MEDIA-SEQUENCE:0\n#EXT-X-PLAYLIST-TYPE:VOD\n")
+        f.writelines(f"{entry}\n" for entry in entries)
+        f.write("#EXT-X-ENDLIST\n")
+    return output_path
+
+
+def transcode_to_hls_single_pass(input_path, output_dir, base_name, heights,
+                                 complexity=1.0, with_audio=None,
+                                 trickplay=False):
+    """
+    Transcode input video to HLS for all heights with one decode of the source.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    if with_audio is None:
+        with_audio = has_audio_stream(run_ffprobe(input_path))
+    run_ffmpeg_hls_multi(input_path, output_dir, base_name, heights,
+                         with_audio, complexity, trickplay)
+    return [get_output_path(output_dir, base_name, h) for h in heights]
+
+
+def transcode_all_heights(input_path, output_dir, base_name, heights,
+                          complexity=1.0, with_audio=None, trickplay=None):
+    """
+    Transcode video to HLS for all requested heights in a single ffmpeg
+    pass. Trickplay sprite sheets are produced as well when trickplay
+    (by default HLS_TRICKPLAY) is on.
+    """
+    if with_audio is None:
+        with_audio = has_audio_stream(run_ffprobe(input_path))
+    if trickplay is None:
+        trickplay = settings.HLS_TRICKPLAY
+    transcode_to_hls_single_pass(input_path, output_dir, base_name,
+                                 heights, complexity, with_audio,
+                                 trickplay=trickplay)
+
+
+def sign_all_variant_playlists(output_dir, base_name, heights,
+                               shared_audio=False):
+    """
+    Sign all variant (and shared audio) .m3u8 playlists with temporary URLs.
+    With request-time signing they stay unsigned templates.
+    """
+    if uses_request_time_signing():
+        return
+    for name in get_variant_names(heights, shared_audio):
+        path = os.path.join(output_dir, f"{base_name}_{name}.m3u8")
         sign_ts_segment_urls(path, base_name)
 
 
+def get_hls_key(base_name, path):
+    """Return the S3 key of an HLS file."""
+    return f"hls/{base_name}/{os.path.basename(path)}"
+
+
+def upload_hls_files(paths, base_name):
+    """Upload HLS files concurrently with the shared client and return the report."""
+    files = [(path, get_hls_key(base_name, path)) for path in paths]
+    return s3_transfer.bulk_upload(
+        get_s3_client(), settings.AWS_STORAGE_BUCKET_NAME, files,
+        max_workers=settings.S3_UPLOAD_WORKERS,
+        retries=settings.S3_UPLOAD_RETRIES)
+
+
+def upload_hls_segments(paths, base_name):
+    """Upload segments and return the paths that were uploaded successfully."""
+    failed = upload_hls_files(paths, base_name)["failed"]
+    for s3_key, error in failed.items():
+        print(f"Error uploading segment {s3_key}, retrying later: {error}")
+    return [path for path in paths
+            if get_hls_key(base_name, path) not in failed]
+
+
 def upload_hls_to_s3(directory, base_name):
-    """Upload all HLS files in directory to S3."""
-    for fname in os.listdir(directory):
-        fpath = os.path.join(directory, fname)
-        s3_key = f"hls/{base_name}/{fname}"
-        upload_to_s3(fpath, s3_key)
+    """
+    Upload all HLS files in directory to S3 and return the upload report.
+    Raises if any file could not be uploaded.
+    """
+    paths = [os.path.join(directory, fname)
+             for fname in sorted(os.listdir(directory))]
+    report = upload_hls_files(paths, base_name)
+    print(f"Uploaded {len(report['uploaded'])} HLS files "
+          f"({report['bytes']} bytes) for {base_name}")
+    if report["failed"]:
+        raise Exception(f"Failed to upload HLS files: {report['failed']}")
+    return report
+
+
+@contextmanager
+def stream_hls_uploads(output_dir, base_name):
+    """
+    Upload finished segments to S3 while ffmpeg is still encoding into
+    output_dir (HLS_STREAM_UPLOADS). Playlists are uploaded afterwards.
+    """
+    if not uses_streaming_uploads():
+        yield
+        return
+    uploader = SegmentUploader(
+        output_dir, lambda paths: upload_hls_segments(paths, base_name))
+    uploader.start()
+    try:
+        yield
+    except Exception:
+        uploader.stop(flush=False)
+        raise
+    uploader.stop()
 
 
 def update_video_hls_field(video_id, base_name):
@@ -269,48 +1318,563 @@ def update_video_hls_field(video_id, base_name):
         )
 
 
-@job('default')
+def update_video_dash_field(video_id, base_name):
+    """Update the dash_manifest field in the Video model."""
+    if video_id:
+        Video.objects.filter(id=video_id).update(
+            dash_manifest=f"hls/{base_name}/{base_name}_manifest.mpd"
+        )
+
+
+def update_video_trickplay_field(video_id, base_name):
+    """Update the trickplay_vtt field in the Video model."""
+    if video_id:
+        Video.objects.filter(id=video_id).update(
+            trickplay_vtt=f"hls/{base_name}/{base_name}_thumbnails.vtt"
+        )
+
+
+def get_transcode_retry():
+    """Return the RQ retry policy of transcode jobs (HLS_JOB_RETRIES)."""
+    return Retry(max=settings.HLS_JOB_RETRIES, interval=RETRY_INTERVALS)
+
+
+def encode_trickplay(source, video_id, base_name, duration=None):
+    """
+    Generate and upload trickplay sprite sheets and their WebVTT track,
+    then checkpoint the step.
+    """
+    with tempfile.TemporaryDirectory() as temp_dir:
+        with progress.track(base_name, TRICKPLAY_STEP, duration=duration):
+            create_trickplay_with_ffmpeg(source, temp_dir, base_name)
+        vtt_path = write_trickplay_vtt(temp_dir, base_name, duration)
+        upload_hls_to_s3(temp_dir, base_name)
+    if vtt_path:
+        update_video_trickplay_field(video_id, base_name)
+    checkpoints.mark_done(base_name, TRICKPLAY_STEP)
+    return vtt_path
+
+
+def encode_rendition(source, base_name, height, complexity=1.0):
+    """
+    Transcode, sign and upload one video rendition, then checkpoint it
+    so a retried job does not encode it again.
+    """
+    with tempfile.TemporaryDirectory() as temp_dir:
+        with stream_hls_uploads(temp_dir, base_name), \
+                progress.track(base_name, f"{height}p"):
+            transcode_to_hls(source, temp_dir, base_name, height,
+                             complexity=complexity)
+        sign_all_variant_playlists(temp_dir, base_name, [height])
+        upload_hls_to_s3(temp_dir, base_name)
+    checkpoints.mark_done(base_name, f"{height}p")
+
+
+def encode_audio_rendition(source, base_name):
+    """Transcode, sign, upload and checkpoint the shared audio rendition."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        with stream_hls_uploads(temp_dir, base_name), \
+                progress.track(base_name, AUDIO_RENDITION):
+            transcode_audio_to_hls(source, temp_dir, base_name)
+        sign_all_variant_playlists(temp_dir, base_name, [], shared_audio=True)
+        upload_hls_to_s3(temp_dir, base_name)
+    checkpoints.mark_done(base_name, AUDIO_RENDITION)
+
+
+@job('transcode')
+def generate_trickplay(video_s3_key, video_id, base_name, duration=None):
+    """
+    Generate trickplay sprite sheets as a separate job
+    (used when renditions are fanned out).
+    """
+    if checkpoints.is_done(base_name, TRICKPLAY_STEP):
+        return None
+    with source_input(video_s3_key) as source:
+        return encode_trickplay(source, video_id, base_name, duration)
+
+
+@job('transcode')
+def transcode_rendition(video_s3_key, base_name, height, complexity=1.0,
+                        video_id=None, heights=None, shared_audio=False):
+    """
+    Transcode, sign and upload a single HLS rendition as its own job and
+    publish it. Renditions already checkpointed by an earlier attempt are skipped.
+    """
+    if not checkpoints.is_done(base_name, f"{height}p"):
+        with source_input(video_s3_key) as source:
+            encode_rendition(source, base_name, height, complexity)
+    publish_available_renditions(video_id, base_name, heights or [height],
+                                 shared_audio)
+    return height
+
+
+@job('transcode')
+def transcode_audio_rendition(video_s3_key, base_name, video_id=None,
+                              heights=None):
+    """
+    Transcode, sign and upload the shared audio rendition as its own job.
+    """
+    if not checkpoints.is_done(base_name, AUDIO_RENDITION):
+        with source_input(video_s3_key) as source:
+            encode_audio_rendition(source, base_name)
+    publish_available_renditions(video_id, base_name, heights or [],
+                                 shared_audio=True)
+    return AUDIO_RENDITION
+
+
+def transcode_sequentially(source, video_id, base_name, heights,
+                           complexity=1.0, shared_audio=False, duration=None):
+    """
+    Encode the renditions one after another, each uploaded and checkpointed
+    as soon as it is done, so a retry continues with the first missing one.
+    The audio and the first rendition come first and the master playlist
+    grows with every finished rendition.
+    """
+    if shared_audio and not checkpoints.is_done(base_name, AUDIO_RENDITION):
+        encode_audio_rendition(source, base_name)
+    for h in order_for_publishing(heights):
+        if not checkpoints.is_done(base_name, f"{h}p"):
+            encode_rendition(source, base_name, h, complexity)
+            publish_available_renditions(video_id, base_name, heights,
+                                         shared_audio)
+    if settings.HLS_TRICKPLAY and not checkpoints.is_done(
+            base_name, TRICKPLAY_STEP):
+        encode_trickplay(source, video_id, base_name,
+                         duration or get_media_duration(run_ffprobe(source)))
+
+
+@job('media-light')
+def finalize_hls(video_id, base_name, heights, shared_audio=False):
+    """
+    Write and upload the signed master playlist (and the DASH manifest
+    in fMP4 mode) once all renditions are uploaded, then update the Video model.
+    """
+    if uses_fmp4_segments():
+        with tempfile.TemporaryDirectory() as temp_dir:
+            mpd_path = create_signed_dash_manifest(
+                temp_dir, base_name, heights, shared_audio)
+            mpd_key = get_hls_key(base_name, mpd_path)
+            if not upload_to_s3(mpd_path, mpd_key):
+                raise Exception(f"Failed to upload DASH manifest: {mpd_key}")
+        update_video_dash_field(video_id, base_name)
+    master_key = publish_master_playlist(
+        video_id, base_name, heights, shared_audio)
+    checkpoints.clear(base_name, [*get_variant_names(heights, shared_audio),
+                                  TRICKPLAY_STEP])
+    checkpoints.clear_published(base_name)
+    return master_key
+
+
+def publish_master_playlist(video_id, base_name, heights, shared_audio=False):
+    """
+    Upload a signed master playlist for heights and point the video at it.
+    The variants are listed and measured before the per-video lock is
+    taken; under the lock the master is only uploaded unless a master with
+    more renditions was published in the meantime.
+    """
+    heights = sorted(heights)
+    with tempfile.TemporaryDirectory() as temp_dir:
+        master_path = create_signed_master_playlist(
+            temp_dir, base_name, heights, shared_audio)
+        master_key = get_hls_key(base_name, master_path)
+        with checkpoints.lock(base_name):
+            if set(heights) < set(checkpoints.get_published(base_name)):
+                return master_key
+            if not upload_to_s3(master_path, master_key):
+                raise Exception(f"Failed to upload master playlist: {master_key}")
+            checkpoints.set_published(base_name, heights)
+    playlists.invalidate(master_key)
+    update_video_hls_field(video_id, base_name)
+    return master_key
+
+
+def publish_available_renditions(video_id, base_name, heights,
+                                 shared_audio=False):
+    """
+    Publish a master playlist with every rendition finished so far, so a
+    new upload becomes playable with its first rendition (HLS_PROGRESSIVE).
+    Returns the published heights.
+    """
+    if not (video_id and settings.HLS_PROGRESSIVE):
+        return []
+    if shared_audio and not checkpoints.is_done(base_name, AUDIO_RENDITION):
+        return []
+    available = [h for h in heights if checkpoints.is_done(base_name, f"{h}p")]
+    if available:
+        publish_master_playlist(video_id, base_name, available, shared_audio)
+    return available
+
+
+def publish_first_rendition(source, video_id, base_name, heights,
+                            complexity=1.0, shared_audio=False):
+    """
+    Encode and publish the audio and the first rendition on their own ahead
+    of the single pass, so the video is playable early. Returns the heights
+    the single pass still has to encode.
+    """
+    first = order_for_publishing(heights)[0]
+    if shared_audio and not checkpoints.is_done(base_name, AUDIO_RENDITION):
+        encode_audio_rendition(source, base_name)
+    if not checkpoints.is_done(base_name, f"{first}p"):
+        encode_rendition(source, base_name, first, complexity)
+    publish_available_renditions(video_id, base_name, heights, shared_audio)
+    return [h for h in heights if not checkpoints.is_done(base_name, f"{h}p")]
+
+
+def order_for_publishing(heights):
+    """
+    Return heights with the first rendition to publish (the highest one not
+    above HLS_FIRST_RENDITION_HEIGHT) at the front, the rest ascending.
+    """
+    heights = sorted(heights)
+    fitting = [h for h in heights if h <= settings.HLS_FIRST_RENDITION_HEIGHT]
+    first = fitting[-1] if fitting else heights[0]
+    return [first] + [h for h in heights if h != first]
+
+
+@job('transcode')
+def transcode_chunk(video_s3_key, base_name, index, start, end, heights,
+                    complexity=1.0):
+    """
+    Transcode the time range [start, end) of the source for all heights
+    and upload its segments and chunk playlists. Timestamps are offset by
+    start so the stitched playlists stay continuous. The shared audio
+    rendition is not chunked: AAC priming and padding at every chunk
+    boundary would be audible, so it is encoded by its own job.
+    """
+    chunk_name = get_chunk_name(base_name, index)
+    if checkpoints.is_done(base_name, chunk_name):
+        return index
+    input_args = ["-ss", f"{start:.3f}", "-t", f"{end - start:.3f}"]
+    output_args = ["-output_ts_offset", f"{start:.3f}"]
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        with source_input(video_s3_key) as source, \
+                stream_hls_uploads(temp_dir, base_name):
+            for h in heights:
+                with progress.track(base_name, f"{chunk_name}_{h}p",
+                                    duration=end - start):
+                    transcode_to_hls(source, temp_dir, chunk_name, h,
+                                     input_args=input_args,
+                                     output_args=output_args,
+                                     complexity=complexity)
+        upload_hls_to_s3(temp_dir, base_name)
+    checkpoints.mark_done(base_name, chunk_name)
+    return index
+
+
+def download_chunk_playlists(output_dir, base_name, variant, chunk_count):
+    """Download the chunk playlists of one rendition ('720p', 'audio') in chunk order."""
+    paths = []
+    for index in range(chunk_count):
+        chunk_name = get_chunk_name(base_name, index)
+        path = os.path.join(output_dir, f"{chunk_name}_{variant}.m3u8")
+        s3_key = f"hls/{base_name}/{os.path.basename(path)}"
+        if not download_from_s3(s3_key, path):
+            raise Exception(f"Failed to download chunk playlist: {s3_key}")
+        paths.append(path)
+    return paths
+
+
+@job('media-light')
+def stitch_chunked_hls(video_id, base_name, heights, chunk_count,
+                       shared_audio=False):
+    """
+    Stitch the chunk playlists into one signed playlist per video
+    rendition, upload them and publish the master playlist. The shared
+    audio rendition was encoded whole and is published as it is.
+    """
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for name in get_variant_names(heights):
+            chunk_paths = download_chunk_playlists(
+                temp_dir, base_name, name, chunk_count)
+            stitch_playlists(chunk_paths, os.path.join(
+                temp_dir, f"{base_name}_{name}.m3u8"))
+            cleanup_files(chunk_paths)
+        sign_all_variant_playlists(temp_dir, base_name, heights)
+        upload_hls_to_s3(temp_dir, base_name)
+    checkpoints.clear(base_name, [get_chunk_name(base_name, index)
+                                  for index in range(chunk_count)])
+    return finalize_hls(video_id, base_name, heights, shared_audio)
+
+
+def enqueue_chunked_transcode(input_path, video_s3_key, video_id, base_name,
+                              heights, complexity=1.0, duration=None,
+                              shared_audio=False):
+    """
+    Split the source at keyframes into HLS_CHUNK_SECONDS ranges, enqueue one
+    job per range (plus one job for the whole shared audio rendition) and a
+    stitch job that runs once all of them are uploaded.
+    """
+    if not duration:
+        duration = get_media_duration(run_ffprobe(input_path))
+    chunks = plan_chunks(probe_keyframe_times(input_path), duration,
+                         settings.HLS_CHUNK_SECONDS)
+    queue = django_rq.get_queue('transcode')
+    if settings.HLS_TRICKPLAY:
+        queue.enqueue(generate_trickplay, video_s3_key, video_id, base_name,
+                      duration, job_timeout=settings.HLS_RENDITION_TIMEOUT,
+                      retry=get_transcode_retry())
+    chunk_jobs = []
+    if shared_audio:
+        chunk_jobs.append(queue.enqueue(
+            transcode_audio_rendition, video_s3_key, base_name,
+            job_timeout=settings.HLS_RENDITION_TIMEOUT,
+            retry=get_transcode_retry()))
+    chunk_jobs += [
+        queue.enqueue(transcode_chunk, video_s3_key, base_name, i,
+                      start, end, heights, complexity,
+                      job_timeout=settings.HLS_RENDITION_TIMEOUT,
+                      retry=get_transcode_retry())
+        for i, (start, end) in enumerate(chunks)
+    ]
+    return django_rq.get_queue('media-light').enqueue(
+        stitch_chunked_hls, video_id, base_name, heights, len(chunks),
+        shared_audio, depends_on=chunk_jobs)
+
+
+def enqueue_parallel_transcode(video_s3_key, video_id, base_name, heights,
+                               complexity=1.0, duration=None,
+                               shared_audio=False):
+    """
+    Enqueue one job per rendition (plus the shared audio rendition) and a
+    finalize job that runs once every rendition job has finished successfully.
+    """
+    queue = django_rq.get_queue('transcode')
+    rendition_jobs = []
+    if shared_audio:
+        rendition_jobs.append(queue.enqueue(
+            transcode_audio_rendition, video_s3_key, base_name, video_id,
+            heights, job_timeout=settings.HLS_RENDITION_TIMEOUT,
+            retry=get_transcode_retry()))
+    rendition_jobs += [
+        queue.enqueue(transcode_rendition, video_s3_key, base_name, h,
+                      complexity, video_id, heights, shared_audio,
+                      job_timeout=settings.HLS_RENDITION_TIMEOUT,
+                      retry=get_transcode_retry())
+        for h in order_for_publishing(heights)
+    ]
+    if settings.HLS_TRICKPLAY:
+        queue.enqueue(generate_trickplay, video_s3_key, video_id, base_name,
+                      duration, job_timeout=settings.HLS_RENDITION_TIMEOUT,
+                      retry=get_transcode_retry())
+    return django_rq.get_queue('media-light').enqueue(
+        finalize_hls, video_id, base_name, heights, shared_audio,
+        depends_on=rendition_jobs)
+
+
+@job('transcode')
 def transcode_video_to_hls(video_s3_key, video_id, base_name):
     """
     Orchestrates HLS transcoding: download, transcode, sign URLs, upload and update model.
+    In parallel and chunked mode the work is fanned out as separate jobs instead.
+    Every mode checkpoints each uploaded rendition, chunk and the trickplay
+    step, so a retried job skips them. A single pass is checkpointed once
+    its upload succeeded; an interrupted pass is redone as a whole.
     """
-    ext = os.path.splitext(video_s3_key)[1]
-    heights = [120, 360, 720, 1080]
-    temp_input_path = get_temp_file(ext)
+    metadata = get_video_metadata(video_id)
+    duration = metadata and metadata["duration"]
+    progress.register(base_name, duration=duration)
+    if settings.HLS_TRANSCODE_MODE == "parallel":
+        probe_url = generate_presigned_url(video_s3_key,
+                                           expiration=PROBE_URL_EXPIRATION)
+        heights, complexity = plan_encoding_ladder(probe_url, metadata)
+        shared_audio = uses_shared_audio() and source_has_audio(
+            probe_url, metadata)
+        finalize_job = enqueue_parallel_transcode(
+            video_s3_key, video_id, base_name, heights, complexity,
+            duration, shared_audio)
+        return finalize_job.id
 
     with tempfile.TemporaryDirectory() as temp_dir:
-        try:
-            if not download_from_s3(video_s3_key, temp_input_path):
-                raise Exception(f"Failed to download video: {video_s3_key}")
-            transcode_all_heights(
-                temp_input_path, temp_dir, base_name, heights)
-            sign_all_variant_playlists(temp_dir, base_name, heights)
-            master_path = create_signed_master_playlist(
-                temp_dir, base_name, heights)
-            upload_hls_to_s3(temp_dir, base_name)
-            update_video_hls_field(video_id, base_name)
-            return master_path
-        finally:
-            cleanup_files([temp_input_path])
-
-
-@job('default')
+        with source_input(video_s3_key) as source:
+            heights, complexity = plan_encoding_ladder(source, metadata)
+            with_audio = source_has_audio(source, metadata)
+            shared_audio = uses_shared_audio() and with_audio
+            if settings.HLS_TRANSCODE_MODE == "chunked":
+                stitch_job = enqueue_chunked_transcode(
+                    source, video_s3_key, video_id, base_name,
+                    heights, complexity, duration, shared_audio)
+                return stitch_job.id
+            if settings.HLS_TRANSCODE_MODE == "sequential":
+                transcode_sequentially(
+                    source, video_id, base_name, heights, complexity,
+                    shared_audio, duration)
+                return finalize_hls(video_id, base_name, heights, shared_audio)
+            remaining, pass_audio = heights, with_audio
+            if settings.HLS_PROGRESSIVE:
+                remaining = publish_first_rendition(
+                    source, video_id, base_name, heights, complexity,
+                    shared_audio)
+                pass_audio = with_audio and not shared_audio
+            remaining = [h for h in remaining
+                         if not checkpoints.is_done(base_name, f"{h}p")]
+            if shared_audio and checkpoints.is_done(base_name, AUDIO_RENDITION):
+                pass_audio = False
+            pass_trickplay = settings.HLS_TRICKPLAY and \
+                not checkpoints.is_done(base_name, TRICKPLAY_STEP)
+            pass_steps = get_variant_names(remaining, pass_audio and shared_audio)
+            if pass_trickplay:
+                pass_steps.append(TRICKPLAY_STEP)
+            if remaining:
+                with stream_hls_uploads(temp_dir, base_name), \
+                        progress.track(base_name, *pass_steps):
+                    transcode_all_heights(source, temp_dir, base_name,
+                                          remaining, complexity, pass_audio,
+                                          trickplay=pass_trickplay)
+            elif pass_trickplay:
+                with progress.track(base_name, *pass_steps):
+                    create_trickplay_with_ffmpeg(source, temp_dir, base_name)
+            vtt_path = None
+            if pass_trickplay:
+                vtt_path = write_trickplay_vtt(
+                    temp_dir, base_name,
+                    duration or get_media_duration(run_ffprobe(source)))
+        sign_all_variant_playlists(temp_dir, base_name, remaining,
+                                   pass_audio and shared_audio)
+        upload_hls_to_s3(temp_dir, base_name)
+        if vtt_path:
+            update_video_trickplay_field(video_id, base_name)
+        for step in pass_steps:
+            checkpoints.mark_done(base_name, step)
+        return finalize_hls(video_id, base_name, heights, shared_audio)
+
+
+@job('media-light')
 def generate_thumbnail_and_save(video_s3_key, video_id, base_name):
     """Wrapper for thumbnail generation with DB update."""
-    thumbnail_s3_key = generate_thumbnail(video_s3_key, base_name)
+    thumbnail_fields = generate_thumbnail(video_s3_key, base_name)
     if video_id:
-        Video.objects.filter(id=video_id).update(thumbnail=thumbnail_s3_key)
+        Video.objects.filter(id=video_id).update(**thumbnail_fields)
+
+
+def get_base_name(video_s3_key):
+    """Return the name the HLS files and thumbnails of a video are based on."""
+    return os.path.splitext(os.path.basename(video_s3_key))[0]
+
+
+def hash_chunks(chunks):
+    """Return the SHA-256 hex digest of an iterable of byte chunks."""
+    digest = hashlib.sha256()
+    for chunk in chunks:
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+def hash_file(path):
+    """Return the SHA-256 hex digest of a local file."""
+    with open(path, "rb") as f:
+        return hash_chunks(iter(lambda: f.read(HASH_CHUNK_SIZE), b""))
+
+
+def store_source_hash(video_s3_key, local_path):
+    """
+    Store the content hash of a freshly downloaded source on the videos
+    that were not hashed yet, so later re-uploads of the file find them.
+    """
+    videos = Video.objects.filter(video_file=video_s3_key,
+                                  content_hash__isnull=True)
+    if videos.exists():
+        videos.update(content_hash=hash_file(local_path))
+
+
+def compute_content_hash(video_s3_key):
+    """
+    Return the SHA-256 of the source video. In download mode the file is
+    hashed in the worker-local cache, where the transcode reads it later;
+    otherwise it is streamed from S3.
+    """
+    if settings.VIDEO_SOURCE_INPUT == "download":
+        with local_source(video_s3_key) as path:
+            return hash_file(path)
+    body = get_s3_client().get_object(
+        Bucket=settings.AWS_STORAGE_BUCKET_NAME, Key=video_s3_key)["Body"]
+    return hash_chunks(body.iter_chunks(HASH_CHUNK_SIZE))
+
+
+def find_processed_duplicate(video_id, content_hash):
+    """
+    Return the shared asset and metadata fields of another video with the
+    same content whose HLS, thumbnail and duration are in place, or None.
+    """
+    return Video.objects.filter(content_hash=content_hash) \
+        .exclude(id=video_id) \
+        .exclude(hls_playlist__isnull=True).exclude(hls_playlist="") \
+        .exclude(thumbnail__isnull=True).exclude(thumbnail="") \
+        .filter(duration__isnull=False) \
+        .order_by("id") \
+        .values(*SHARED_ASSET_FIELDS, *MEDIA_METADATA_FIELDS).first()
+
+
+def get_duplicate_candidates(video_id, size):
+    """Return the other videos whose source has the same size."""
+    return Video.objects.filter(file_size=size).exclude(id=video_id)
 
 
-@job('default')
+def hash_unhashed_candidates(candidates):
+    """
+    Hash the sources of candidates that were never read in full (presigned
+    input or parallel mode), so they can be compared by content hash.
+    """
+    for candidate in candidates.filter(content_hash__isnull=True):
+        try:
+            content_hash = compute_content_hash(candidate.video_file.name)
+        except (BotoCoreError, ClientError, OSError) as e:
+            print(f"Error hashing video {candidate.video_file.name}: {e}")
+            continue
+        Video.objects.filter(id=candidate.id).update(content_hash=content_hash)
+
+
+def reuse_duplicate_assets(video_s3_key, video_id):
+    """
+    If an identical file was already processed, point the video at the same
+    S3 assets and copy its metadata. Returns True if the video needs no
+    processing of its own. The source is only hashed here when another
+    video has a source of the same size; all others are hashed when the
+    source cache downloads them.
+    """
+    try:
+        _, size = get_source_version(video_s3_key)
+        candidates = get_duplicate_candidates(video_id, size)
+        if not candidates.exists():
+            return False
+        content_hash = compute_content_hash(video_s3_key)
+    except (BotoCoreError, ClientError, OSError) as e:
+        print(f"Error hashing video {video_s3_key}: {e}")
+        return False
+    Video.objects.filter(id=video_id).update(content_hash=content_hash)
+    hash_unhashed_candidates(candidates)
+    duplicate = find_processed_duplicate(video_id, content_hash)
+    if duplicate is None:
+        return False
+    Video.objects.filter(id=video_id).update(**duplicate)
+    return True
+
+
+def is_shared_asset(field, s3_key):
+    """Return True if a remaining video still references s3_key in field."""
+    return bool(s3_key) and \
+        Video.objects.filter(**{field: s3_key}).exists()
+
+
+@job('media-light')
 def process_video_pipeline(video_s3_key, video_id=None):
-    """Enqueue both thumbnail generation and HLS transcoding for the given video and exports video."""
-    set_video_duration(video_s3_key, video_id)
-    base_name = os.path.splitext(os.path.basename(video_s3_key))[0]
-    queue = django_rq.get_queue('default')
-    queue.enqueue(generate_thumbnail_and_save,
-                  video_s3_key, video_id, base_name)
-    queue.enqueue(transcode_video_to_hls, video_s3_key, video_id, base_name)
+    """
+    Enqueue both thumbnail generation and HLS transcoding for the given
+    video and export the videos. Re-uploads of an already processed file
+    share its assets instead (VIDEO_DEDUPLICATION).
+    """
+    if settings.VIDEO_DEDUPLICATION and video_id and \
+            reuse_duplicate_assets(video_s3_key, video_id):
+        export_model_to_s3(Video)
+        return {"queued": "nothing (duplicate upload)"}
+    set_video_metadata(video_s3_key, video_id)
+    base_name = get_base_name(video_s3_key)
+    django_rq.get_queue('media-light').enqueue(
+        generate_thumbnail_and_save, video_s3_key, video_id, base_name)
+    django_rq.get_queue('transcode').enqueue(
+        transcode_video_to_hls, video_s3_key, video_id, base_name,
+        retry=get_transcode_retry())
     export_model_to_s3(Video)
 
     return {"queued": "thumbnail + hls"}
@@ -323,47 +1887,81 @@ def extract_hls_prefix(hls_master_key):
     return '/'.join(hls_master_key.split('/')[:-1]) + '/'
 
 
-def delete_hls_directory(s3_client, hls_master_key):
+def list_hls_directory_keys(s3_client, hls_master_key):
     """
-    Delete all HLS files for a given master playlist from S3.
+    Return the keys of all HLS files for a given master playlist, following
+    the listing over as many pages as the directory needs. Listing errors
+    propagate, so the deletion job fails and is retried instead of leaving
+    the files behind.
     """
     prefix = extract_hls_prefix(hls_master_key)
-    try:
-        response = s3_client.list_objects_v2(
-            Bucket=settings.AWS_STORAGE_BUCKET_NAME,
-            Prefix=prefix
-        )
-        for obj in response.get('Contents', []):
-            delete_s3_object(s3_client, obj['Key'])
-    except Exception as e:
-        print(f"Error deleting HLS files: {e}")
+    return [obj["Key"] for obj in s3_transfer.iter_objects(
+        s3_client, settings.AWS_STORAGE_BUCKET_NAME, prefix)]
 
 
-def delete_video_file(s3_client, video_key):
+def get_video_asset_keys(s3_client, hls_master_key, thumbnail_key,
+                         video_file_key, thumbnail_variant_keys=None):
     """
-    Delete original video file from S3 (e.g. videos/abc.mp4).
+    Return the S3 keys of a deleted video's assets. HLS files and
+    thumbnails still shared with a re-upload of the same file are kept.
     """
-    try:
-        s3_client.delete_object(
-            Bucket=settings.AWS_STORAGE_BUCKET_NAME,
-            Key=video_key
-        )
-    except Exception as e:
-        print(f"Error deleting video file: {e}")
+    keys = []
+    if hls_master_key and not is_shared_asset("hls_playlist", hls_master_key):
+        keys += list_hls_directory_keys(s3_client, hls_master_key)
+    if not is_shared_asset("thumbnail", thumbnail_key):
+        keys += [key for key in [thumbnail_key, *(thumbnail_variant_keys or [])]
+                 if key]
+    if video_file_key:
+        keys.append(video_file_key)
+    return keys
 
 
-@job('default')
-def delete_video_assets_from_s3(hls_master_key, thumbnail_key, video_file_key):
-    """Delete video assets from S3 and export Video model."""
+def delete_s3_keys(s3_client, keys):
+    """
+    Delete keys in concurrent DeleteObjects batches and return the report.
+    Raises if any key could not be deleted, so the job is retried.
+    """
+    report = s3_transfer.bulk_delete(
+        s3_client, settings.AWS_STORAGE_BUCKET_NAME, keys,
+        max_workers=settings.S3_DELETE_WORKERS,
+        retries=settings.S3_DELETE_RETRIES)
+    print(f"Deleted {len(report['deleted'])} S3 objects")
+    for key, error in report["failed"].items():
+        print(f"Error deleting object {key}: {error}")
+    if report["failed"]:
+        raise Exception(f"Failed to delete {len(report['failed'])} S3 objects")
+    return report
+
+
+def get_deletion_retry():
+    """Return the RQ retry policy of asset deletion jobs (S3_DELETE_RETRIES)."""
+    return Retry(max=settings.S3_DELETE_RETRIES, interval=RETRY_INTERVALS)
+
+
+@job('maintenance')
+def delete_video_assets_from_s3(hls_master_key, thumbnail_key, video_file_key,
+                                thumbnail_variant_keys=None):
+    """
+    Delete video assets from S3 and export Video model. HLS files and
+    thumbnails still shared with a re-upload of the same file are kept.
+    """
     s3_client = get_s3_client()
+    delete_s3_keys(s3_client, get_video_asset_keys(
+        s3_client, hls_master_key, thumbnail_key, video_file_key,
+        thumbnail_variant_keys))
+    export_model_to_s3(Video)
 
-    if hls_master_key:
-        delete_hls_directory(s3_client, hls_master_key)
-
-    if thumbnail_key:
-        delete_s3_object(s3_client, thumbnail_key)
-
-    if video_file_key:
-        delete_video_file(s3_client, video_file_key)
 
+@job('maintenance')
+def bulk_delete_video_assets_from_s3(assets):
+    """
+    Delete the assets of many deleted videos in one job, e.g. after an admin
+    bulk delete, and export the Video model once. assets is a list of the
+    delete_video_assets_from_s3 arguments of every video.
+    """
+    s3_client = get_s3_client()
+    keys = []
+    for video_assets in assets:
+        keys += get_video_asset_keys(s3_client, *video_assets)
+    delete_s3_keys(s3_client, keys)
     export_model_to_s3(Video)
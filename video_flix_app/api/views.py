@@ -8,11 +8,27 @@ from rest_framework.exceptions import PermissionDenied
 from rest_framework.response import Response
 from rest_framework import status
 from django.core.cache import cache
+from django.http import HttpResponse
+from django.urls import reverse
 import random
 
 
 from ..models import Video, UserWatchHistory
 from .serializers import VideoSerializer, UserWatchHistorySerializer
+from .tasks import get_base_name
+from . import progress, playlists
+
+M3U8_CONTENT_TYPE = "application/vnd.apple.mpegurl"
+MPD_CONTENT_TYPE = "application/dash+xml"
+VTT_CONTENT_TYPE = "text/vtt"
+
+
+def playlist_response(text, content_type=M3U8_CONTENT_TYPE):
+    """Return a rendered playlist, or 404 if the video has none."""
+    if text is None:
+        return Response({"detail": "No playlist found."},
+                        status=status.HTTP_404_NOT_FOUND)
+    return HttpResponse(text, content_type=content_type)
 
 
 class VideoViewSet(viewsets.ModelViewSet):
@@ -37,6 +53,74 @@ class VideoViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(video)
         return Response(serializer.data)
 
+    @action(detail=True, methods=['get'], url_path='progress')
+    def transcode_progress(self, request, pk=None):
+        """
+        Returns the live transcode progress (percent, fps, ETA) per
+        rendition, read from the cache without touching the encoder.
+        """
+        video = self.get_object()
+        data = progress.get_progress(get_base_name(video.video_file.name))
+        if data is None:
+            return Response({"detail": "No transcode progress found."},
+                            status=status.HTTP_404_NOT_FOUND)
+        return Response(data)
+
+    @action(detail=True, methods=['get'], url_path='playlist',
+            url_name='playlist')
+    def master_playlist(self, request, pk=None):
+        """
+        Returns the HLS master playlist with its variant playlists pointing
+        at this endpoint, so their segments are signed when they are loaded.
+        """
+        video = self.get_object()
+        if not video.hls_playlist:
+            return playlist_response(None)
+        return playlist_response(playlists.render_master(
+            video.hls_playlist,
+            lambda fname: reverse('video-variant-playlist',
+                                  args=[video.pk, fname])))
+
+    @action(detail=True, methods=['get'],
+            url_path=r'playlist/(?P<fname>[\w.-]+\.m3u8)',
+            url_name='variant-playlist')
+    def variant_playlist(self, request, pk=None, fname=None):
+        """
+        Returns a variant or audio playlist of the video with segment URLs
+        signed for the current window (HLS_PLAYLIST_SIGNING_WINDOW).
+        """
+        video = self.get_object()
+        if not video.hls_playlist:
+            return playlist_response(None)
+        return playlist_response(
+            playlists.render_media(video.hls_playlist, fname))
+
+    @action(detail=True, methods=['get'], url_path='manifest',
+            url_name='manifest')
+    def dash_manifest(self, request, pk=None):
+        """
+        Returns the DASH manifest of the video with segment URLs signed for
+        the current window (HLS_PLAYLIST_SIGNING_WINDOW).
+        """
+        video = self.get_object()
+        if not video.dash_manifest:
+            return playlist_response(None)
+        return playlist_response(
+            playlists.render_manifest(video.dash_manifest), MPD_CONTENT_TYPE)
+
+    @action(detail=True, methods=['get'], url_path='trickplay',
+            url_name='trickplay')
+    def trickplay(self, request, pk=None):
+        """
+        Returns the trickplay WebVTT track of the video with sprite sheet
+        URLs signed for the current window (HLS_PLAYLIST_SIGNING_WINDOW).
+        """
+        video = self.get_object()
+        if not video.trickplay_vtt:
+            return playlist_response(None)
+        return playlist_response(
+            playlists.render_trickplay(video.trickplay_vtt), VTT_CONTENT_TYPE)
+
     def get_queryset(self):
         user = self.request.user
         if user.is_authenticated:
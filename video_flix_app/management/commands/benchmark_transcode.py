@@ -0,0 +1,308 @@
+import json
+import os
+import resource
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from multiprocessing import get_context
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+
+from video_flix_app.api import tasks
+
+BENCHMARK_BUCKET = "benchmark"
+DEFAULT_SIZES = "640x360,1280x720,1920x1080"
+DEFAULT_DURATIONS = "10,30"
+DEFAULT_RATE = 30
+
+
+class LocalS3Client:
+    """
+    Stand-in for the boto3 S3 client that keeps objects as files below
+    root/<bucket>/<key>. Covers the calls made by the transcode and
+    thumbnail paths.
+    """
+
+    def __init__(self, root):
+        self.root = root
+
+    def get_path(self, bucket, key):
+        path = os.path.join(self.root, bucket, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        return path
+
+    def upload_file(self, local_path, bucket, key, Config=None):
+        shutil.copyfile(local_path, self.get_path(bucket, key))
+
+    def download_file(self, bucket, key, local_path):
+        shutil.copyfile(self.get_path(bucket, key), local_path)
+
+    def head_object(self, Bucket, Key):
+        stat = os.stat(self.get_path(Bucket, Key))
+        return {"ETag": f'"{stat.st_mtime_ns:x}"',
+                "ContentLength": stat.st_size}
+
+    def get_object(self, Bucket, Key, Range=None):
+        with open(self.get_path(Bucket, Key), "rb") as f:
+            if Range:
+                first, _, last = Range.split("=", 1)[1].partition("-")
+                f.seek(int(first))
+                data = f.read(int(last) - int(first) + 1)
+            else:
+                data = f.read()
+        return {"Body": _Body(data)}
+
+
+class _Body:
+    """Minimal StreamingBody with read() and iter_chunks()."""
+
+    def __init__(self, data):
+        self.data = data
+
+    def read(self):
+        return self.data
+
+    def iter_chunks(self, chunk_size):
+        for start in range(0, len(self.data), chunk_size):
+            yield self.data[start:start + chunk_size]
+
+
+@contextmanager
+def local_s3(root, work_dir):
+    """Route the S3 client and source cache to the local filesystem."""
+    client = LocalS3Client(root)
+    with override_settings(
+            S3_CLIENT=client,
+            AWS_STORAGE_BUCKET_NAME=BENCHMARK_BUCKET,
+            VIDEO_SOURCE_INPUT="download",
+            VIDEO_SOURCE_CACHE_DIR=os.path.join(work_dir, "cache")):
+        yield client
+
+
+def parse_sizes(value):
+    """Return [(width, height), ...] of a '640x360,1280x720' option."""
+    return [tuple(int(n) for n in size.split("x"))
+            for size in value.split(",") if size]
+
+
+def parse_durations(value):
+    """Return the clip lengths in seconds of a '10,30' option."""
+    return [int(d) for d in value.split(",") if d]
+
+
+def generate_clip(path, width, height, duration, rate):
+    """
+    Encode a deterministic testsrc2 + sine clip. Bit-exact flags keep the
+    file identical across runs, so only the code under test changes.
+    """
+    subprocess.run([
+        "ffmpeg", "-v", "error", "-y",
+        "-f", "lavfi", "-i",
+        f"testsrc2=size={width}x{height}:rate={rate}:duration={duration}",
+        "-f", "lavfi", "-i",
+        f"sine=frequency=440:sample_rate=48000:duration={duration}",
+        "-c:v", "libx264", "-preset", "veryfast", "-pix_fmt", "yuv420p",
+        "-c:a", "aac", "-b:a", "128k",
+        "-fflags", "+bitexact", "-flags:v", "+bitexact",
+        "-flags:a", "+bitexact", "-shortest",
+        path
+    ], check=True)
+
+
+def get_cpu_seconds():
+    """Return the CPU seconds of this process and its waited-for children."""
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return own.ru_utime + own.ru_stime + children.ru_utime + children.ru_stime
+
+
+def read_child_peak_rss(pid):
+    """
+    Return the largest VmHWM (KiB) of the running children of pid.
+    The rusage of children also counts the Python process they were forked
+    from, so the ffmpeg peak is read from /proc while it runs.
+    """
+    peak = 0
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+            if ppid != pid:
+                continue
+            with open(f"/proc/{entry}/status") as f:
+                for line in f:
+                    if line.startswith("VmHWM:"):
+                        peak = max(peak, int(line.split()[1]))
+        except (OSError, IndexError, ValueError):
+            continue
+    return peak
+
+
+class PeakRssSampler(threading.Thread):
+    """Samples the peak RSS of the child processes while a step runs."""
+
+    def __init__(self, interval=0.02):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.peak = 0
+        self._stop_event = threading.Event()
+
+    def run(self):
+        pid = os.getpid()
+        while not self._stop_event.wait(self.interval):
+            self.peak = max(self.peak, read_child_peak_rss(pid))
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+        return self.peak
+
+
+def run_measured(func, args):
+    """Run func(*args) and return its result with wall time, CPU and peak RSS."""
+    sampler = PeakRssSampler()
+    sampler.start()
+    cpu_before = get_cpu_seconds()
+    start = time.perf_counter()
+    result = func(*args)
+    wall = time.perf_counter() - start
+    cpu_seconds = get_cpu_seconds() - cpu_before
+    return result, {
+        "wall_seconds": round(wall, 3),
+        "cpu_seconds": round(cpu_seconds, 3),
+        "peak_rss_kb": sampler.stop() or None,
+    }
+
+
+def measure(func, *args):
+    """
+    Run func in a fresh forked process, so CPU time and peak RSS of the
+    ffmpeg children it waits for belong to this measurement only.
+    """
+    with ProcessPoolExecutor(max_workers=1,
+                             mp_context=get_context("fork")) as executor:
+        return executor.submit(run_measured, func, args).result()
+
+
+def encode_and_upload_rendition(source, output_dir, base_name, height):
+    """
+    Run the real rendition path: transcode one height (or the shared audio
+    rendition for height None), then upload through the client.
+    """
+    if height is None:
+        tasks.transcode_audio_to_hls(source, output_dir, base_name)
+    else:
+        tasks.transcode_to_hls(source, output_dir, base_name, height)
+    report = tasks.upload_hls_to_s3(output_dir, base_name)
+    return {"bytes": report["bytes"], "files": len(report["uploaded"])}
+
+
+def benchmark_clip(client, source_key, source_path, work_dir, name, height,
+                   frames):
+    """Return the per-rendition and thumbnail measurements of one clip."""
+    renditions = []
+    heights = tasks.select_ladder_heights(height)
+    if tasks.uses_shared_audio():
+        heights.append(None)
+    for h in heights:
+        variant = f"{h}p" if h else tasks.AUDIO_RENDITION
+        output_dir = os.path.join(work_dir, "hls", name, variant)
+        result, stats = measure(encode_and_upload_rendition,
+                                source_path, output_dir, name, h)
+        renditions.append({
+            "rendition": variant,
+            "fps": round(frames / stats["wall_seconds"], 2) if h else None,
+            **stats,
+            **result,
+        })
+    fields, thumbnail = measure(tasks.generate_thumbnail, source_key, name)
+    keys = [fields["thumbnail"],
+            *tasks.get_thumbnail_variant_keys(fields["thumbnail_variants"])]
+    thumbnail["bytes"] = sum(
+        os.path.getsize(client.get_path(BENCHMARK_BUCKET, key))
+        for key in keys)
+    return {"renditions": renditions, "thumbnail": thumbnail}
+
+
+def get_ffmpeg_version():
+    """Return the first line of ffmpeg -version."""
+    result = subprocess.run(["ffmpeg", "-version"], check=True,
+                            capture_output=True, text=True)
+    return result.stdout.splitlines()[0]
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the HLS ladder and thumbnail paths on synthetic clips "
+        "against a local filesystem stand-in for S3 and print a JSON report "
+        "(per-rendition fps, CPU seconds, peak RSS and output bytes)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", default=DEFAULT_SIZES,
+                            help="Source resolutions, e.g. 640x360,1920x1080")
+        parser.add_argument("--durations", default=DEFAULT_DURATIONS,
+                            help="Clip lengths in seconds, e.g. 10,30")
+        parser.add_argument("--rate", type=int, default=DEFAULT_RATE,
+                            help="Frame rate of the synthetic clips")
+        parser.add_argument("--output",
+                            help="Write the JSON report to this file")
+        parser.add_argument("--work-dir",
+                            help="Keep clips and outputs in this directory")
+
+    def handle(self, *args, **options):
+        work_dir = options["work_dir"] or tempfile.mkdtemp(
+            prefix="transcode_benchmark_")
+        os.makedirs(work_dir, exist_ok=True)
+        try:
+            report = self.run_benchmark(work_dir, options)
+        finally:
+            if not options["work_dir"]:
+                shutil.rmtree(work_dir, ignore_errors=True)
+        data = json.dumps(report, indent=2)
+        if options["output"]:
+            with open(options["output"], "w") as f:
+                f.write(data + "\n")
+        else:
+            self.stdout.write(data)
+
+    def run_benchmark(self, work_dir, options):
+        rate = options["rate"]
+        s3_root = os.path.join(work_dir, "s3")
+        clips = []
+        with local_s3(s3_root, work_dir) as client:
+            for width, height in parse_sizes(options["sizes"]):
+                for duration in parse_durations(options["durations"]):
+                    name = f"bench_{width}x{height}_{duration}s"
+                    source_key = f"videos/{name}.mp4"
+                    source_path = client.get_path(BENCHMARK_BUCKET, source_key)
+                    generate_clip(source_path, width, height, duration, rate)
+                    self.stderr.write(f"Benchmarking {name}...")
+                    clips.append({
+                        "name": name,
+                        "width": width,
+                        "height": height,
+                        "duration": duration,
+                        "rate": rate,
+                        "source_bytes": os.path.getsize(source_path),
+                        **benchmark_clip(client, source_key, source_path,
+                                         work_dir, name, height,
+                                         duration * rate),
+                    })
+        return {
+            "ffmpeg": get_ffmpeg_version(),
+            "settings": {
+                "HLS_SEGMENT_FORMAT": settings.HLS_SEGMENT_FORMAT,
+                "HLS_SINGLE_FILE": settings.HLS_SINGLE_FILE,
+                "HLS_SHARED_AUDIO": settings.HLS_SHARED_AUDIO,
+            },
+            "clips": clips,
+        }
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.1 on 2026-10-18 02:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('video_flix_app', '0011_video_media_metadata'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='video',
+            name='trickplay_vtt',
+            field=models.CharField(blank=True, max_length=500, null=True),
+        ),
+    ]
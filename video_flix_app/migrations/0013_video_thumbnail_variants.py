@@ -0,0 +1,18 @@
+# Generated by Django 5.2.1 on 2026-10-18 02:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('video_flix_app', '0012_video_trickplay_vtt'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='video',
+            name='thumbnail_variants',
+            field=models.JSONField(blank=True, null=True),
+        ),
+    ]
@@ -20,11 +20,29 @@ class Video(models.Model):
     description = models.TextField(null=True, blank=True)
     duration = models.PositiveIntegerField(
         null=True, blank=True, help_text="Duration in seconds")
+    width = models.PositiveIntegerField(null=True, blank=True)
+    height = models.PositiveIntegerField(null=True, blank=True)
+    fps = models.FloatField(null=True, blank=True)
+    video_codec = models.CharField(max_length=50, null=True, blank=True)
+    audio_codec = models.CharField(max_length=50, null=True, blank=True)
+    bitrate = models.PositiveIntegerField(
+        null=True, blank=True, help_text="Bitrate in bits per second")
+    file_size = models.PositiveBigIntegerField(
+        null=True, blank=True, help_text="File size in bytes")
     video_file = models.FileField(upload_to=video_file_upload_to)
+    content_hash = models.CharField(
+        max_length=64, null=True, blank=True,
+        db_index=True)  # SHA-256 of the uploaded file, finds re-uploads
     thumbnail = models.CharField(
         max_length=500, null=True, blank=True)  # S3 key for thumbnail
+    thumbnail_variants = models.JSONField(
+        null=True, blank=True)  # {format: {width: S3 key}} of resized thumbnails
     hls_playlist = models.CharField(
         max_length=500, null=True, blank=True)  # S3 key for HLS master playlist
+    dash_manifest = models.CharField(
+        max_length=500, null=True, blank=True)  # S3 key for DASH manifest
+    trickplay_vtt = models.CharField(
+        max_length=500, null=True, blank=True)  # S3 key for trickplay WebVTT
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     genre = models.CharField(max_length=255, null=False, blank=False)
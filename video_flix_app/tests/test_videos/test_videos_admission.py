@@ -0,0 +1,22 @@
+from video_flix_app.api import admission
+
+
+def test_slot_count_follows_cores_and_thread_budget(settings):
+    """The slots of a host split its cores into per-encode thread budgets."""
+    settings.TRANSCODE_CPU_CORES = 16
+    settings.TRANSCODE_THREADS_PER_SLOT = 4
+    settings.TRANSCODE_SLOTS = 0
+    assert (admission.get_thread_budget(), admission.get_slot_count()) == (4, 4)
+    settings.TRANSCODE_CPU_CORES = 2
+    assert (admission.get_thread_budget(), admission.get_slot_count()) == (2, 1)
+
+
+def test_slot_is_exclusive_until_released(settings, tmp_path):
+    """A busy slot cannot be taken by another encode until it is released."""
+    settings.TRANSCODE_SLOT_DIR = str(tmp_path)
+    settings.TRANSCODE_SLOTS = 1
+    with admission.slot():
+        assert admission.try_acquire(str(tmp_path), 1) is None
+    lock_file = admission.try_acquire(str(tmp_path), 1)
+    assert lock_file is not None
+    lock_file.close()
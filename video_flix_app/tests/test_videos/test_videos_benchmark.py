@@ -0,0 +1,35 @@
+from video_flix_app.api import playlists, tasks
+from video_flix_app.management.commands.benchmark_transcode import (
+    LocalS3Client,
+    local_s3,
+    parse_sizes,
+    parse_durations,
+)
+
+
+def test_local_s3_client_round_trip(tmp_path):
+    """The stand-in keeps objects as files and serves ranged reads."""
+    client = LocalS3Client(str(tmp_path / "s3"))
+    source = tmp_path / "a.bin"
+    source.write_bytes(b"0123456789")
+    client.upload_file(str(source), "bucket", "videos/a.bin")
+    assert client.head_object(Bucket="bucket", Key="videos/a.bin")[
+        "ContentLength"] == 10
+    body = client.get_object(Bucket="bucket", Key="videos/a.bin",
+                             Range="bytes=2-4")["Body"]
+    assert body.read() == b"234"
+    client.download_file("bucket", "videos/a.bin", str(tmp_path / "b.bin"))
+    assert (tmp_path / "b.bin").read_bytes() == b"0123456789"
+
+
+def test_local_s3_is_injected_into_get_s3_client(tmp_path):
+    """The benchmark client replaces boto3 through the S3_CLIENT setting."""
+    with local_s3(str(tmp_path / "s3"), str(tmp_path)) as client:
+        assert tasks.get_s3_client() is client
+        assert playlists.get_s3_client() is client
+
+
+def test_parse_benchmark_options():
+    """Resolutions and durations are parsed from comma separated lists."""
+    assert parse_sizes("640x360,1920x1080") == [(640, 360), (1920, 1080)]
+    assert parse_durations("10,30,") == [10, 30]
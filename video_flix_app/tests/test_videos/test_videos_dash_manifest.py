@@ -0,0 +1,65 @@
+import xml.etree.ElementTree as ET
+from video_flix_app.api import dash_manifest
+
+NS = {"mpd": dash_manifest.MPD_NAMESPACE}
+
+STITCHED_PLAYLIST = """#EXTM3U
+#EXT-X-VERSION:7
+#EXT-X-TARGETDURATION:10
+#EXT-X-MAP:URI="https://s3/a_chunk0000_360p_init.mp4?sig=1"
+#EXTINF:10.000000,
+https://s3/a_chunk0000_360p_000.m4s?sig=1
+#EXT-X-MAP:URI="https://s3/a_chunk0001_360p_init.mp4?sig=1"
+#EXTINF:4.500000,
+https://s3/a_chunk0001_360p_000.m4s?sig=1
+#EXT-X-ENDLIST
+"""
+
+
+def test_parse_media_playlist_splits_runs_per_init_segment(tmp_path):
+    """Every EXT-X-MAP starts a new run of segments."""
+    path = tmp_path / "a_360p.m3u8"
+    path.write_text(STITCHED_PLAYLIST)
+    runs = dash_manifest.parse_media_playlist(str(path))
+    assert [run["init"] for run in runs] == [
+        "https://s3/a_chunk0000_360p_init.mp4?sig=1",
+        "https://s3/a_chunk0001_360p_init.mp4?sig=1"]
+    assert runs[1]["segments"] == [
+        (4.5, "https://s3/a_chunk0001_360p_000.m4s?sig=1", None)]
+
+
+def test_parse_media_playlist_reads_single_file_byte_ranges(tmp_path):
+    """Init and segment byte ranges of a single-file rendition are kept."""
+    path = tmp_path / "a_360p.m3u8"
+    path.write_text('#EXTM3U\n#EXT-X-MAP:URI="a_360p.m4s",BYTERANGE="800@0"\n'
+                    "#EXTINF:10.0,\n#EXT-X-BYTERANGE:1000@800\na_360p.m4s\n"
+                    "#EXTINF:4.0,\n#EXT-X-BYTERANGE:500\na_360p.m4s\n")
+    run = dash_manifest.parse_media_playlist(str(path))[0]
+    assert run["init_range"] == (800, 0)
+    assert [r for _, _, r in run["segments"]] == [(1000, 800), (500, 1800)]
+    assert dash_manifest.format_range(run["segments"][1][2]) == "1800-2299"
+
+
+def test_build_mpd_creates_one_period_per_run(tmp_path):
+    """Periods follow the runs and keep the media timestamps via the offset."""
+    path = tmp_path / "a_360p.m3u8"
+    path.write_text(STITCHED_PLAYLIST)
+    mpd = ET.fromstring(dash_manifest.build_mpd([{
+        "id": "360p", "mime_type": "video/mp4", "bandwidth": 720000,
+        "height": 360,
+        "codecs": "avc1.4d401e,mp4a.40.2",
+        "runs": dash_manifest.parse_media_playlist(str(path)),
+    }]).split("?>", 1)[1])
+    assert mpd.get("mediaPresentationDuration") == "PT14.500S"
+    periods = mpd.findall("mpd:Period", NS)
+    assert [p.get("start") for p in periods] == ["PT0.000S", "PT10.000S"]
+    segment_list = periods[1].find(".//mpd:SegmentList", NS)
+    assert segment_list.get("presentationTimeOffset") == "10000"
+    assert segment_list.find("mpd:SegmentTimeline/mpd:S", NS).get("t") == "10000"
+
+
+def test_get_init_codecs_reads_avcc_profile_and_level(tmp_path):
+    """The avc1 string comes from the avcC box bytes."""
+    path = tmp_path / "init.mp4"
+    path.write_bytes(b"\x00stsd....avcC\x01\x4d\x40\x1f\xff....mp4a")
+    assert dash_manifest.get_init_codecs(str(path)) == "avc1.4d401f,mp4a.40.2"
@@ -0,0 +1,25 @@
+from video_flix_app.api.hls_streaming import SegmentUploader
+
+
+def test_segment_uploader_uploads_only_finished_segments(tmp_path):
+    """Finished segments are uploaded and removed, temp files and playlists are kept."""
+    (tmp_path / "a_120p_000.ts").write_bytes(b"seg")
+    (tmp_path / "a_120p_001.ts.tmp").write_bytes(b"partial")
+    (tmp_path / "a_120p.m3u8").write_text("#EXTM3U\n")
+    uploaded = []
+    uploader = SegmentUploader(
+        str(tmp_path), lambda paths: uploaded.extend(paths) or paths)
+    uploader.upload_finished_segments()
+    assert [p.split("/")[-1] for p in uploaded] == ["a_120p_000.ts"]
+    assert not (tmp_path / "a_120p_000.ts").exists()
+    assert (tmp_path / "a_120p_001.ts.tmp").exists()
+    assert (tmp_path / "a_120p.m3u8").exists()
+
+
+def test_segment_uploader_keeps_segments_that_failed_to_upload(tmp_path):
+    """A failed upload leaves the segment for the next pass."""
+    (tmp_path / "a_120p_000.ts").write_bytes(b"seg")
+    uploader = SegmentUploader(str(tmp_path), lambda paths: [])
+    uploader.upload_finished_segments()
+    assert (tmp_path / "a_120p_000.ts").exists()
+    assert uploader.uploaded == set()
@@ -1,5 +1,7 @@
 import pytest
 from video_flix_app.models import Video, video_file_upload_to
+from video_flix_app.api.signals import batch_video_deletions
+from video_flix_app.api.tasks import bulk_delete_video_assets_from_s3
 
 
 @pytest.mark.django_db
@@ -50,3 +52,22 @@ def test_post_delete_signal_enqueues_deletion(mocker):
     mock_queue.reset_mock()
     video.delete()
     mock_queue.enqueue.assert_called_once()
+
+
+@pytest.mark.django_db
+def test_batch_video_deletions_enqueues_one_job(mocker, settings):
+    """Deleting many videos in a batch enqueues a single bulk job."""
+    settings.S3_DELETE_RETRIES = 3
+    mock_queue = mocker.patch(
+        "video_flix_app.api.signals.django_rq.get_queue").return_value
+    for title in ("A", "B", "C"):
+        Video.objects.create(title=title, video_file=f"videos/{title}.mp4")
+    mock_queue.reset_mock()
+    with batch_video_deletions():
+        Video.objects.all().delete()
+    mock_queue.enqueue.assert_called_once()
+    func, assets = mock_queue.enqueue.call_args.args
+    assert func is bulk_delete_video_assets_from_s3
+    assert mock_queue.enqueue.call_args.kwargs["retry"].max == 3
+    assert sorted(a[2] for a in assets) == [
+        "videos/A.mp4", "videos/B.mp4", "videos/C.mp4"]
@@ -0,0 +1,77 @@
+from video_flix_app.api import playlists
+
+MASTER = """#EXTM3U
+#EXT-X-MEDIA:TYPE=AUDIO,GROUP-ID="audio",URI="https://s3/hls/a/a_audio.m3u8?X-Amz-Expires=604800"
+#EXT-X-STREAM-INF:BANDWIDTH=1000,AUDIO="audio"
+https://s3/hls/a/a_360p.m3u8?X-Amz-Expires=604800
+"""
+
+
+def test_rewrite_uris_extracts_file_names_of_baked_urls():
+    """Old playlists with signed URLs baked in render like templates."""
+    text = playlists.rewrite_uris(MASTER, lambda fname: f"/api/{fname}")
+    assert text.splitlines()[1].endswith('URI="/api/a_audio.m3u8"')
+    assert text.splitlines()[3] == "/api/a_360p.m3u8"
+
+
+def test_render_media_signs_template_once_per_window(mocker, settings):
+    """Segments are signed short-lived and the output is cached per window."""
+    settings.HLS_PLAYLIST_SIGNING_WINDOW = 3600
+    load = mocker.patch(
+        "video_flix_app.api.playlists.load_template",
+        return_value='#EXTM3U\n#EXT-X-MAP:URI="a_360p_init.mp4"\n'
+                     "#EXTINF:4.0,\na_360p_000.m4s\n")
+    get_client = mocker.patch("video_flix_app.api.playlists.get_s3_client")
+    sign = mocker.patch(
+        "video_flix_app.api.playlists.build_presigned_url",
+        side_effect=lambda client, key, content_type, expiration:
+            f"signed/{key}?{expiration}")
+    first = playlists.render_media("hls/a/a_master.m3u8", "a_360p.m3u8")
+    second = playlists.render_media("hls/a/a_master.m3u8", "a_360p.m3u8")
+    assert first == second
+    assert first.splitlines()[1] == \
+        '#EXT-X-MAP:URI="signed/hls/a/a_360p_init.mp4?7200"'
+    assert first.splitlines()[3] == "signed/hls/a/a_360p_000.m4s?7200"
+    load.assert_called_once_with("hls/a/a_360p.m3u8")
+    assert sign.call_count == 2
+    get_client.assert_called_once()
+
+
+def test_render_master_fills_in_endpoint_per_video(mocker):
+    """Videos sharing a deduplicated master get their own endpoint URLs."""
+    load = mocker.patch("video_flix_app.api.playlists.load_template",
+                        return_value=MASTER)
+    first = playlists.render_master("hls/a/a_master.m3u8",
+                                    lambda fname: f"/api/videos/1/{fname}")
+    second = playlists.render_master("hls/a/a_master.m3u8",
+                                     lambda fname: f"/api/videos/2/{fname}")
+    assert first.splitlines()[3] == "/api/videos/1/a_360p.m3u8"
+    assert second.splitlines()[3] == "/api/videos/2/a_360p.m3u8"
+    load.assert_called_once_with("hls/a/a_master.m3u8")
+
+
+def test_render_manifest_and_trickplay_sign_referenced_files(mocker):
+    """DASH segment URLs are XML-escaped; VTT cues keep their #xywh tiles."""
+    mocker.patch("video_flix_app.api.playlists.get_s3_client")
+    mocker.patch(
+        "video_flix_app.api.playlists.build_presigned_url",
+        side_effect=lambda client, key, content_type, expiration:
+            f"https://s3/{key}?a=1&b=2")
+    mocker.patch(
+        "video_flix_app.api.playlists.load_template",
+        side_effect=lambda key: {
+            "hls/m/m_manifest.mpd":
+                '<Initialization sourceURL="m_360p_init.mp4" />\n'
+                '<SegmentURL media="m_360p_000.m4s" mediaRange="0-9" />\n',
+            "hls/m/m_thumbnails.vtt":
+                "WEBVTT\n\n00:00:00.000 --> 00:00:10.000\n"
+                "m_sprite_001.jpg#xywh=0,0,160,90\n",
+        }[key])
+    mpd = playlists.render_manifest("hls/m/m_manifest.mpd").splitlines()
+    assert mpd[0] == ('<Initialization sourceURL='
+                      '"https://s3/hls/m/m_360p_init.mp4?a=1&amp;b=2" />')
+    assert mpd[1] == ('<SegmentURL media="https://s3/hls/m/m_360p_000.m4s'
+                      '?a=1&amp;b=2" mediaRange="0-9" />')
+    vtt = playlists.render_trickplay("hls/m/m_thumbnails.vtt").splitlines()
+    assert vtt[-1] == \
+        "https://s3/hls/m/m_sprite_001.jpg?a=1&b=2#xywh=0,0,160,90"
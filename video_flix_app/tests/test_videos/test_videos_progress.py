@@ -0,0 +1,57 @@
+import subprocess
+
+import pytest
+from video_flix_app.api import progress
+
+PROGRESS_OUTPUT = [
+    "fps=50.00\n", "out_time_us=5000000\n", "speed=2.5x\n",
+    "progress=continue\n",
+    "fps=48.00\n", "out_time_us=10000000\n", "speed=2.5x\n",
+    "progress=end\n",
+]
+
+
+def test_summarize_reports_percent_fps_and_eta():
+    """Percent and ETA follow from out_time, the duration and the speed."""
+    blocks = list(progress.parse_progress(PROGRESS_OUTPUT))
+    summary = progress.summarize(blocks[0], duration=20)
+    assert (summary["percent"], summary["fps"], summary["eta"]) == \
+        (25.0, 50.0, 6)
+    assert summary["status"] == "running"
+    assert progress.summarize(blocks[1], duration=20)["percent"] == 100.0
+
+
+def test_summarize_without_duration_keeps_fps():
+    """An unknown duration leaves percent and ETA empty."""
+    summary = progress.summarize(
+        {"fps": "30.0", "out_time_us": "N/A", "speed": "N/A",
+         "progress": "continue"})
+    assert (summary["percent"], summary["fps"], summary["eta"]) == \
+        (None, 30.0, None)
+
+
+def test_run_ffmpeg_reports_progress_of_tracked_steps(mocker, settings):
+    """Tracked ffmpeg runs write throttled progress per step to the cache."""
+    settings.HLS_PROGRESS_INTERVAL = 60
+    popen = mocker.patch("video_flix_app.api.progress.subprocess.Popen")
+    popen.return_value.stdout = PROGRESS_OUTPUT
+    popen.return_value.wait.return_value = 0
+    progress.register("prog", duration=20)
+    with progress.track("prog", "360p", "720p"):
+        progress.run_ffmpeg(["ffmpeg", "-i", "in.mp4", "out.m3u8"])
+    assert popen.call_args.args[0][:3] == ["ffmpeg", "-progress", "pipe:1"]
+    renditions = progress.get_progress("prog")["renditions"]
+    assert list(renditions) == ["360p", "720p"]
+    assert renditions["720p"]["status"] == "done"
+
+
+def test_run_ffmpeg_marks_failed_steps(mocker):
+    """A failed ffmpeg run raises and leaves its steps marked as failed."""
+    popen = mocker.patch("video_flix_app.api.progress.subprocess.Popen")
+    popen.return_value.stdout = PROGRESS_OUTPUT[:4]
+    popen.return_value.wait.return_value = 1
+    with pytest.raises(subprocess.CalledProcessError):
+        with progress.track("broken", "audio"):
+            progress.run_ffmpeg(["ffmpeg", "-i", "in.mp4", "out.m3u8"])
+    assert progress.get_progress("broken")["renditions"]["audio"]["status"] \
+        == "failed"
@@ -0,0 +1,62 @@
+from boto3.exceptions import S3UploadFailedError
+from botocore.exceptions import ClientError
+from video_flix_app.api import s3_transfer
+
+
+def test_bulk_upload_reports_uploaded_and_failed_files(mocker, tmp_path):
+    """bulk_upload retries failing files and reports them with their error."""
+    mocker.patch.object(s3_transfer, "RETRY_BACKOFF_SECONDS", 0)
+    good = tmp_path / "good.ts"
+    bad = tmp_path / "bad.ts"
+    good.write_bytes(b"1234")
+    bad.write_bytes(b"12")
+    s3_client = mocker.Mock()
+
+    def upload_file(path, bucket, key, Config):
+        if key.endswith("bad.ts"):
+            raise ClientError({"Error": {"Code": "500"}}, "PutObject")
+    s3_client.upload_file.side_effect = upload_file
+
+    report = s3_transfer.bulk_upload(
+        s3_client, "bucket",
+        [(str(good), "hls/x/good.ts"), (str(bad), "hls/x/bad.ts")],
+        max_workers=2, retries=2)
+
+    assert report["uploaded"] == ["hls/x/good.ts"]
+    assert list(report["failed"]) == ["hls/x/bad.ts"]
+    assert report["bytes"] == 4
+    assert s3_client.upload_file.call_count == 4
+
+
+def test_upload_file_with_retry_retries_failed_transfers(mocker):
+    """S3UploadFailedError of the transfer manager is retried and reported."""
+    mocker.patch.object(s3_transfer, "RETRY_BACKOFF_SECONDS", 0)
+    s3_client = mocker.Mock()
+    s3_client.upload_file.side_effect = S3UploadFailedError("connection reset")
+
+    error = s3_transfer.upload_file_with_retry(
+        s3_client, "bucket", "seg.ts", "hls/x/seg.ts", retries=2)
+
+    assert error == "connection reset"
+    assert s3_client.upload_file.call_count == 3
+
+
+def test_bulk_delete_batches_keys_and_retries_failed_ones(mocker):
+    """Keys go out in batches of 1000 and per-key errors are retried."""
+    mocker.patch.object(s3_transfer, "RETRY_BACKOFF_SECONDS", 0)
+    s3_client = mocker.Mock()
+    s3_client.delete_objects.side_effect = [
+        {},
+        {"Errors": [{"Key": "k1000", "Code": "SlowDown"}]},
+        {"Errors": [{"Key": "k1000", "Code": "SlowDown"}]},
+    ]
+    keys = [f"k{i}" for i in range(1001)]
+
+    report = s3_transfer.bulk_delete(s3_client, "bucket", keys + ["k0"],
+                                     max_workers=1, retries=1)
+
+    assert report["failed"] == {"k1000": "SlowDown"}
+    assert len(report["deleted"]) == 1000
+    sizes = [len(c.kwargs["Delete"]["Objects"])
+             for c in s3_client.delete_objects.call_args_list]
+    assert sizes == [1000, 1, 1]
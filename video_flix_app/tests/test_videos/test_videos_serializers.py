@@ -1,9 +1,18 @@
 import pytest
-from video_flix_app.api.serializers import VideoSerializer
+from video_flix_app.api.serializers import VideoSerializer, load_bucket_url
+from video_flix_app.api import serializers
 from video_flix_app.models import Video
 from unittest.mock import patch
 
 
+@pytest.fixture(autouse=True)
+def clear_presigned_urls():
+    """Start every test without URLs cached by an earlier one."""
+    load_bucket_url.cache_clear()
+    yield
+    load_bucket_url.cache_clear()
+
+
 @pytest.mark.django_db
 def test_video_serializer_fields(mocker):
     """VideoSerializer serializes expected fields."""
@@ -17,8 +26,9 @@ def test_video_serializer_fields(mocker):
 
 
 @pytest.mark.django_db
-def test_thumbnail_and_hls_url_calls_presigned_url(mocker):
+def test_thumbnail_and_hls_url_calls_presigned_url(mocker, settings):
     """Thumbnail and HLS URL fields call generate_presigned_url."""
+    settings.HLS_REQUEST_TIME_SIGNING = False
     video = Video.objects.create(
         title="T", thumbnail="thumb", hls_playlist="playlist"
     )
@@ -28,3 +38,62 @@ def test_thumbnail_and_hls_url_calls_presigned_url(mocker):
     data = serializer.data
     assert data["thumbnail_url"] == "signed_url"
     assert data["hls_playlist_url"] == "signed_url"
+
+
+@pytest.mark.django_db
+def test_hls_url_points_at_playlist_endpoint_with_request_signing(mocker, settings):
+    """With request-time signing players load the master from the API."""
+    settings.HLS_REQUEST_TIME_SIGNING = True
+    video = Video.objects.create(title="T", hls_playlist="hls/a/a_master.m3u8")
+    sign = mocker.patch("video_flix_app.api.serializers.generate_presigned_url")
+    data = VideoSerializer(video).data
+    assert data["hls_playlist_url"] == f"/api/video/{video.pk}/playlist/"
+    sign.assert_not_called()
+
+
+@pytest.mark.django_db
+def test_thumbnail_variant_urls_are_signed_per_format_and_width(mocker):
+    """thumbnail_variant_urls maps format and width to signed URLs."""
+    video = Video.objects.create(
+        title="T", thumbnail_variants={"webp": {"320": "thumbnails/a_320w.webp"}}
+    )
+    mocker.patch("video_flix_app.api.serializers.generate_presigned_url",
+                 side_effect=lambda key, expiration: f"signed/{key}")
+    data = VideoSerializer(video).data
+    assert data["thumbnail_variant_urls"] == {
+        "webp": {"320": "signed/thumbnails/a_320w.webp"}}
+
+
+def test_presigned_urls_are_reused_within_an_expiry_bucket(mocker, settings):
+    """Repeated lookups in one bucket sign once; a new bucket signs again."""
+    settings.PRESIGNED_URL_CACHE_WINDOW = 3600
+    sign = mocker.patch("video_flix_app.api.serializers.generate_presigned_url",
+                        side_effect=lambda key, expiration: f"signed-{sign.call_count}")
+    now = mocker.patch("video_flix_app.api.serializers.time.time",
+                       return_value=7200 * 1000 + 10)
+    first = serializers.get_cached_presigned_url("thumbnails/reuse.jpg")
+    assert serializers.get_cached_presigned_url("thumbnails/reuse.jpg") == first
+    load_bucket_url.cache_clear()
+    assert serializers.get_cached_presigned_url("thumbnails/reuse.jpg") == first
+    assert sign.call_count == 1
+    now.return_value += 3600
+    assert serializers.get_cached_presigned_url("thumbnails/reuse.jpg") != first
+
+
+def test_failed_signing_is_not_cached(mocker, settings):
+    """A signing that fails is retried by the next lookup in the bucket."""
+    settings.PRESIGNED_URL_CACHE_WINDOW = 3600
+    sign = mocker.patch("video_flix_app.api.serializers.generate_presigned_url",
+                        side_effect=[None, "signed"])
+    mocker.patch("video_flix_app.api.serializers.time.time",
+                 return_value=7200 * 1000 + 10)
+    assert serializers.get_cached_presigned_url("thumbnails/fail.jpg") is None
+    assert serializers.get_cached_presigned_url("thumbnails/fail.jpg") == "signed"
+    assert sign.call_count == 2
+
+
+def test_short_lived_urls_use_shorter_buckets(settings):
+    """A bucket never spans more than half of the URL lifetime."""
+    settings.PRESIGNED_URL_CACHE_WINDOW = 3600
+    assert serializers.get_url_window(900) == 450
+    assert serializers.get_url_window(604800) == 3600
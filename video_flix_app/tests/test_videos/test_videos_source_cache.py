@@ -0,0 +1,63 @@
+import os
+import pytest
+from video_flix_app.api import source_cache
+
+
+@pytest.fixture
+def cache_settings(settings, tmp_path):
+    """Point the source cache at a temporary directory."""
+    settings.VIDEO_SOURCE_CACHE_DIR = str(tmp_path / "cache")
+    settings.VIDEO_SOURCE_CACHE_MAX_BYTES = 10
+    return settings
+
+
+def make_download(calls, content=b"12345"):
+    """Return a download callable that records its calls."""
+    def download(path):
+        calls.append(path)
+        with open(path, "wb") as f:
+            f.write(content)
+    return download
+
+
+def test_open_cached_downloads_once_per_version(cache_settings):
+    """A second read of the same key and ETag is served from disk."""
+    calls = []
+    with source_cache.open_cached("videos/a.mp4", "etag1", 5,
+                                  make_download(calls)) as path:
+        assert open(path, "rb").read() == b"12345"
+    with source_cache.open_cached("videos/a.mp4", "etag1", 5,
+                                  make_download(calls)) as cached_path:
+        assert cached_path == path
+    assert len(calls) == 1
+
+
+def test_open_cached_evicts_least_recently_used(cache_settings):
+    """Entries are evicted oldest first when the size budget is exceeded."""
+    calls = []
+    with source_cache.open_cached("videos/a.mp4", "e", 5,
+                                  make_download(calls)) as first:
+        pass
+    os.utime(first, (0, 0))
+    with source_cache.open_cached("videos/b.mp4", "e", 5,
+                                  make_download(calls)) as second:
+        pass
+    with source_cache.open_cached("videos/c.mp4", "e", 5,
+                                  make_download(calls)):
+        pass
+    assert not os.path.exists(first)
+    assert os.path.exists(second)
+    assert not os.path.exists(first + source_cache.LOCK_SUFFIX)
+    assert os.path.exists(second + source_cache.LOCK_SUFFIX)
+
+
+def test_failed_download_leaves_no_lock_file(cache_settings):
+    """A download that fails removes the entry's lock file again."""
+    def download(path):
+        raise OSError("boom")
+    with pytest.raises(OSError):
+        with source_cache.open_cached("videos/a.mp4", "e", 5, download):
+            pass
+    cache_dir = cache_settings.VIDEO_SOURCE_CACHE_DIR
+    assert [name for name in os.listdir(cache_dir)
+            if name != source_cache.CACHE_LOCK_NAME] == []
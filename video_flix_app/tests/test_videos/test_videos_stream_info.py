@@ -0,0 +1,10 @@
+from video_flix_app.api import stream_info
+
+
+def test_measure_bitrates_returns_peak_segment_and_average():
+    """The peak is the busiest segment, the average spans the whole playlist."""
+    peak, average = stream_info.measure_bitrates(
+        [(4.0, 100000), (2.0, 100000), (1.0, None)])
+    assert peak == 400000
+    assert average == 266667
+    assert stream_info.measure_bitrates([]) == (None, None)
@@ -1,8 +1,25 @@
+import subprocess
 import pytest
+from botocore.exceptions import ClientError
 from video_flix_app.api.tasks import (
     generate_thumbnail_and_save,
     delete_video_assets_from_s3,
+    build_split_filter,
+    build_variant_args,
+    finalize_hls,
+    transcode_video_to_hls,
+    plan_chunks,
+    stitch_playlists,
+    select_ladder_heights,
+    extract_media_metadata,
+    set_video_metadata,
+    ffmpeg_input,
+    source_input,
+    format_vtt_timestamp,
+    write_trickplay_vtt,
+    create_thumbnail_variants,
 )
+from video_flix_app.api import tasks, checkpoints
 from video_flix_app.models import Video
 
 
@@ -10,21 +27,70 @@ from video_flix_app.models import Video
 def test_generate_thumbnail_and_save_updates_db(mocker):
     """generate_thumbnail_and_save updates video thumbnail field."""
     video = Video.objects.create(title="ThumbVid")
+    variants = {"webp": {"320": "thumbnails/base_name_320w.webp"}}
     mocker.patch("video_flix_app.api.tasks.generate_thumbnail",
-                 return_value="thumb_key")
+                 return_value={"thumbnail": "thumb_key",
+                               "thumbnail_variants": variants})
     generate_thumbnail_and_save(video.video_file.name, video.id, "base_name")
     video.refresh_from_db()
     assert video.thumbnail == "thumb_key"
+    assert video.thumbnail_variants == variants
 
 
 @pytest.mark.django_db
 def test_delete_video_assets_from_s3_calls_deletes(mocker):
     """delete_video_assets_from_s3 deletes video assets on S3."""
     mock_s3_client = mocker.Mock()
+    mock_s3_client.list_objects_v2.return_value = {
+        "Contents": [{"Key": "hls/a/a_master.m3u8"}]}
+    mock_s3_client.delete_objects.return_value = {}
     mocker.patch("video_flix_app.api.tasks.get_s3_client",
                  return_value=mock_s3_client)
-    delete_video_assets_from_s3("hls_key", "thumb_key", "video_key")
-    assert mock_s3_client.delete_object.called
+    delete_video_assets_from_s3("hls/a/a_master.m3u8", "thumb_key", "video_key")
+    deleted = mock_s3_client.delete_objects.call_args.kwargs["Delete"]["Objects"]
+    assert deleted == [{"Key": "hls/a/a_master.m3u8"}, {"Key": "thumb_key"},
+                       {"Key": "video_key"}]
+
+
+@pytest.mark.django_db
+def test_delete_video_assets_fails_when_listing_fails(mocker):
+    """A failed listing fails the job for a retry instead of orphaning files."""
+    s3_client = mocker.patch("video_flix_app.api.tasks.get_s3_client").return_value
+    s3_client.list_objects_v2.side_effect = ClientError(
+        {"Error": {"Code": "SlowDown"}}, "ListObjectsV2")
+    with pytest.raises(ClientError):
+        delete_video_assets_from_s3("hls/a/a_master.m3u8", "thumb_key",
+                                    "video_key")
+    s3_client.delete_objects.assert_not_called()
+
+
+def test_delete_s3_keys_fails_job_for_undeleted_keys(mocker):
+    """Keys still failing after the batch retries fail the job for RQ."""
+    mocker.patch("video_flix_app.api.tasks.s3_transfer.bulk_delete",
+                 return_value={"deleted": ["a"], "failed": {"b": "SlowDown"}})
+    with pytest.raises(Exception, match="1 S3 objects"):
+        tasks.delete_s3_keys(mocker.Mock(), ["a", "b"])
+
+
+@pytest.mark.django_db
+def test_bulk_delete_video_assets_lists_all_pages_in_one_job(mocker):
+    """Every listing page is followed and all videos share the batches."""
+    mocker.patch("video_flix_app.api.tasks.export_model_to_s3")
+    s3_client = mocker.patch("video_flix_app.api.tasks.get_s3_client").return_value
+    s3_client.list_objects_v2.side_effect = [
+        {"Contents": [{"Key": f"hls/a/a_{i}.ts"} for i in range(1000)],
+         "IsTruncated": True, "NextContinuationToken": "next"},
+        {"Contents": [{"Key": "hls/a/a_master.m3u8"}]},
+    ]
+    s3_client.delete_objects.return_value = {}
+    tasks.bulk_delete_video_assets_from_s3([
+        ("hls/a/a_master.m3u8", None, "videos/a.mp4", []),
+        (None, "thumbnails/b.jpg", "videos/b.mp4", ["thumbnails/b_320w.webp"]),
+    ])
+    assert s3_client.list_objects_v2.call_args.kwargs["ContinuationToken"] == "next"
+    batches = [c.kwargs["Delete"]["Objects"]
+               for c in s3_client.delete_objects.call_args_list]
+    assert [len(batch) for batch in batches] == [1000, 5]
 
 
 def get_encoding_params(height):
@@ -52,3 +118,564 @@ def test_get_encoding_params_default_values():
     assert bitrate == 1000
     assert maxrate == 1200
     assert bufsize == 2000
+
+
+def test_build_split_filter_scales_each_height():
+    """Split filter decodes once and scales one labelled output per height."""
+    graph = build_split_filter([120, 360])
+    assert graph == ("[0:v]split=2[v0][v1];"
+                     "[v0]scale=-2:120[v0out];[v1]scale=-2:360[v1out]")
+
+
+def test_build_variant_args_names_variants_by_height(settings):
+    """var_stream_map names every variant after its height."""
+    settings.HLS_SHARED_AUDIO = False
+    args, stream_map = build_variant_args([120, 360], with_audio=True)
+    assert stream_map == "v:0,a:0,name:120p v:1,a:1,name:360p"
+    assert args.count("0:a:0") == 2
+    _, stream_map = build_variant_args([120], with_audio=False)
+    assert stream_map == "v:0,name:120p"
+
+
+def test_build_variant_args_maps_shared_audio_once(settings):
+    """With shared audio the track is mapped once into the audio group."""
+    settings.HLS_SHARED_AUDIO = True
+    args, stream_map = build_variant_args([120, 360], with_audio=True)
+    assert stream_map == ("v:0,agroup:audio,name:120p v:1,agroup:audio,name:360p "
+                          "a:0,agroup:audio,name:audio")
+    assert args.count("0:a:0") == 1
+
+
+def test_signed_master_playlist_declares_audio_group(mocker, settings, tmp_path):
+    """Every variant references the EXT-X-MEDIA audio rendition."""
+    settings.HLS_REQUEST_TIME_SIGNING = False
+    mocker.patch("video_flix_app.api.tasks.generate_presigned_url",
+                 side_effect=lambda key: f"signed/{key}")
+    mocker.patch("video_flix_app.api.tasks.list_hls_object_sizes",
+                 return_value={})
+    mocker.patch("video_flix_app.api.tasks.measure_variant", return_value={
+        "bandwidth": 1000, "average_bandwidth": None, "codecs": []})
+    master = tasks.create_signed_master_playlist(
+        str(tmp_path), "a", [360], shared_audio=True)
+    lines = open(master).read().splitlines()
+    assert lines[1].startswith('#EXT-X-MEDIA:TYPE=AUDIO,GROUP-ID="audio"')
+    assert lines[1].endswith('URI="signed/hls/a/a_audio.m3u8"')
+    assert lines[2].endswith(',AUDIO="audio"')
+
+
+def test_signed_master_playlist_advertises_measured_variants(mocker, tmp_path):
+    """Bitrates come from the uploaded segments, size and codecs from ffprobe."""
+    (tmp_path / "a_360p.m3u8").write_text(
+        "#EXTM3U\n#EXTINF:4.0,\na_360p_000.ts\n#EXTINF:2.0,\na_360p_001.ts\n")
+    mocker.patch("video_flix_app.api.tasks.generate_presigned_url",
+                 side_effect=lambda key: f"signed/{key}")
+    mocker.patch("video_flix_app.api.tasks.list_hls_object_sizes",
+                 return_value={"a_360p_000.ts": 200000,
+                               "a_360p_001.ts": 150000})
+    mocker.patch("video_flix_app.api.tasks.probe_media_header",
+                 return_value={"streams": [
+                     {"codec_type": "video", "codec_name": "h264",
+                      "profile": "High", "level": 30, "width": 640,
+                      "height": 360, "r_frame_rate": "30000/1001"},
+                     {"codec_type": "audio", "codec_name": "aac",
+                      "profile": "LC"}]})
+    master = tasks.create_signed_master_playlist(str(tmp_path), "a", [360])
+    lines = open(master).read().splitlines()
+    assert lines[1] == (
+        "#EXT-X-STREAM-INF:BANDWIDTH=600000,AVERAGE-BANDWIDTH=466667,"
+        'RESOLUTION=640x360,CODECS="avc1.64001e,mp4a.40.2",FRAME-RATE=29.970')
+    assert lines[2] == "a_360p.m3u8"
+
+
+def test_probe_media_header_probes_init_and_first_segment(mocker, tmp_path):
+    """ffprobe sees the init segment followed by the start of the first one."""
+    (tmp_path / "a_360p_init.mp4").write_bytes(b"init")
+    (tmp_path / "a_360p_000.m4s").write_bytes(b"fragment")
+    probed = {}
+
+    def run_ffprobe(path):
+        probed["data"] = open(path, "rb").read()
+        raise subprocess.CalledProcessError(1, "ffprobe")
+
+    mocker.patch("video_flix_app.api.tasks.run_ffprobe",
+                 side_effect=run_ffprobe)
+    run = {"init": "a_360p_init.mp4", "init_range": None,
+           "segments": [(4.0, "a_360p_000.m4s", None)]}
+    assert tasks.probe_media_header(str(tmp_path), "a", run) == {}
+    assert probed["data"] == b"initfragment"
+    assert tasks.describe_media({}) == {
+        "codecs": [], "width": None, "height": None, "frame_rate": None}
+
+
+@pytest.mark.django_db
+def test_parallel_mode_enqueues_rendition_jobs_and_finalize(mocker, settings):
+    """Parallel mode enqueues one job per height and a dependent finalize job."""
+    settings.HLS_TRANSCODE_MODE = "parallel"
+    settings.HLS_TRICKPLAY = False
+    settings.HLS_SHARED_AUDIO = False
+    mocker.patch("video_flix_app.api.tasks.generate_presigned_url")
+    mocker.patch("video_flix_app.api.tasks.plan_encoding_ladder",
+                 return_value=([120, 360, 720, 1080], 1.0))
+    get_queue = mocker.patch("video_flix_app.api.tasks.django_rq.get_queue")
+    mock_queue = get_queue.return_value
+    transcode_video_to_hls("videos/a.mp4", 1, "a")
+    assert [c.args[0] for c in get_queue.call_args_list] == [
+        "transcode", "media-light"]
+    calls = mock_queue.enqueue.call_args_list
+    assert len(calls) == 5
+    assert calls[-1].args[0] is finalize_hls
+    assert len(calls[-1].kwargs["depends_on"]) == 4
+
+
+@pytest.mark.django_db
+def test_finalize_hls_uploads_master_and_updates_video(mocker):
+    """finalize_hls uploads the master playlist and sets hls_playlist."""
+    video = Video.objects.create(title="Final")
+    mocker.patch("video_flix_app.api.tasks.generate_presigned_url",
+                 return_value="signed_url")
+    mocker.patch("video_flix_app.api.tasks.list_hls_object_sizes",
+                 return_value={})
+    mocker.patch("video_flix_app.api.tasks.measure_variant", return_value={
+        "bandwidth": 1000, "average_bandwidth": None, "codecs": []})
+    mock_upload = mocker.patch("video_flix_app.api.tasks.upload_to_s3",
+                               return_value=True)
+    checkpoints.mark_done("base", "360p")
+    checkpoints.mark_done("base", tasks.TRICKPLAY_STEP)
+    finalize_hls(video.id, "base", [120, 360])
+    assert mock_upload.call_args.args[1] == "hls/base/base_master.m3u8"
+    video.refresh_from_db()
+    assert video.hls_playlist == "hls/base/base_master.m3u8"
+    assert not checkpoints.is_done("base", "360p")
+    assert not checkpoints.is_done("base", tasks.TRICKPLAY_STEP)
+
+
+@pytest.mark.django_db
+def test_slow_publish_does_not_replace_fuller_master(mocker):
+    """A master measured for fewer renditions never overwrites a fuller one."""
+    video = Video.objects.create(title="Race")
+    lock = mocker.spy(tasks.checkpoints, "lock")
+
+    def measure(temp_dir, base_name, heights, shared_audio):
+        assert not lock.called
+        path = f"{temp_dir}/{base_name}_master.m3u8"
+        open(path, "w").close()
+        return path
+
+    mocker.patch("video_flix_app.api.tasks.create_signed_master_playlist",
+                 side_effect=measure)
+    upload = mocker.patch("video_flix_app.api.tasks.upload_to_s3",
+                          return_value=True)
+    tasks.publish_master_playlist(video.id, "race", [360, 720])
+    lock.reset_mock()
+    tasks.publish_master_playlist(video.id, "race", [360])
+    assert upload.call_count == 1
+    lock.reset_mock()
+    tasks.finalize_hls(video.id, "race", [120, 360, 720])
+    assert upload.call_count == 2
+    assert tasks.checkpoints.get_published("race") == []
+
+
+def test_plan_chunks_starts_on_keyframes_and_merges_short_tail():
+    """Chunks start on keyframes and a short tail joins the last chunk."""
+    keyframes = [0.0, 2.0, 4.0, 6.0, 8.0, 10.0, 12.0]
+    assert plan_chunks(keyframes, 12.5, 4) == [
+        (0.0, 4.0), (4.0, 8.0), (8.0, 12.5)]
+
+
+def test_stitch_playlists_concatenates_segments(tmp_path):
+    """Stitched playlist lists all chunk segments in order."""
+    first = tmp_path / "c0.m3u8"
+    second = tmp_path / "c1.m3u8"
+    first.write_text("#EXTM3U\n#EXT-X-TARGETDURATION:10\n"
+                     "#EXTINF:10.0,\na_000.ts\n#EXT-X-ENDLIST\n")
+    second.write_text("#EXTM3U\n#EXT-X-TARGETDURATION:11\n"
+                      "#EXTINF:11.0,\nb_000.ts\n#EXT-X-ENDLIST\n")
+    output = tmp_path / "out.m3u8"
+    stitch_playlists([first, second], output)
+    content = output.read_text()
+    assert "#EXT-X-TARGETDURATION:11" in content
+    assert content.index("a_000.ts") < content.index("b_000.ts")
+    assert content.count("#EXT-X-ENDLIST") == 1
+
+
+def test_select_ladder_heights_never_upscales():
+    """Heights above the source are skipped, the lowest rung is kept."""
+    assert select_ladder_heights(480) == [120, 360]
+    assert select_ladder_heights(1080) == [120, 360, 720, 1080]
+    assert select_ladder_heights(90) == [120]
+    assert select_ladder_heights(None) == [120, 360, 720, 1080]
+
+
+def test_sample_and_audio_encodes_take_a_transcode_slot(mocker, tmp_path):
+    """Complexity samples and shared audio encodes respect admission control."""
+    slot = mocker.patch("video_flix_app.api.tasks.admission.slot")
+    mocker.patch("video_flix_app.api.tasks.admission.get_thread_budget",
+                 return_value=3)
+    run = mocker.patch("video_flix_app.api.tasks.subprocess.run")
+    mocker.patch("video_flix_app.api.tasks.os.path.getsize",
+                 return_value=100000)
+    run_ffmpeg = mocker.patch("video_flix_app.api.tasks.progress.run_ffmpeg")
+    tasks.measure_complexity("in.mp4", 60)
+    tasks.transcode_audio_to_hls("in.mp4", str(tmp_path), "a")
+    assert slot.call_count == 2
+    for args in (run.call_args.args[0], run_ffmpeg.call_args.args[0]):
+        assert args.count("-threads") == 2
+        assert args[args.index("-threads") + 1] == "3"
+
+
+def test_encoding_params_scale_with_complexity():
+    """Complexity factor scales bitrate, maxrate and bufsize."""
+    assert tasks.get_encoding_params(360, complexity=0.5) == (300, 450, 900)
+
+
+PROBE_OUTPUT = {
+    "format": {"duration": "62.48", "bit_rate": "2500000", "size": "19525000"},
+    "streams": [
+        {"codec_type": "video", "codec_name": "h264", "width": 1280,
+         "height": 720, "avg_frame_rate": "30000/1001"},
+        {"codec_type": "audio", "codec_name": "aac"},
+    ],
+}
+
+
+def test_extract_media_metadata_reads_streams_and_format():
+    """Metadata is extracted from ffprobe streams and format."""
+    metadata = extract_media_metadata(PROBE_OUTPUT)
+    assert metadata == {
+        "duration": 62, "width": 1280, "height": 720, "fps": 29.97,
+        "video_codec": "h264", "audio_codec": "aac",
+        "bitrate": 2500000, "file_size": 19525000,
+    }
+
+
+@pytest.mark.django_db
+def test_set_video_metadata_probes_presigned_url(mocker):
+    """set_video_metadata probes the presigned URL and stores all fields."""
+    video = Video.objects.create(title="Probe")
+    mocker.patch("video_flix_app.api.tasks.generate_presigned_url",
+                 return_value="https://signed")
+    mock_probe = mocker.patch("video_flix_app.api.tasks.run_ffprobe",
+                              return_value=PROBE_OUTPUT)
+    mock_download = mocker.patch("video_flix_app.api.tasks.download_from_s3")
+    set_video_metadata("videos/a.mp4", video.id)
+    mock_probe.assert_called_once_with("https://signed")
+    mock_download.assert_not_called()
+    video.refresh_from_db()
+    assert video.duration == 62
+    assert video.height == 720
+    assert video.video_codec == "h264"
+
+
+def test_ffmpeg_input_adds_reconnect_options_for_urls_only():
+    """HTTP inputs get reconnect options, local paths do not."""
+    assert ffmpeg_input("/tmp/a.mp4", "-ss", "1") == [
+        "-ss", "1", "-i", "/tmp/a.mp4"]
+    args = ffmpeg_input("https://minio/a.mp4")
+    assert args[0] == "-reconnect"
+    assert args[-2:] == ["-i", "https://minio/a.mp4"]
+
+
+def test_source_input_yields_presigned_url_without_download(mocker, settings):
+    """Presigned input mode hands ffmpeg a URL instead of downloading."""
+    settings.VIDEO_SOURCE_INPUT = "presigned"
+    mocker.patch("video_flix_app.api.tasks.generate_presigned_url",
+                 return_value="https://signed")
+    mock_local = mocker.patch("video_flix_app.api.tasks.local_source")
+    with source_input("videos/a.mp4") as source:
+        assert source == "https://signed"
+    mock_local.assert_not_called()
+
+
+def test_build_split_filter_adds_trickplay_branch():
+    """Trickplay adds a tiled sprite branch to the shared split."""
+    graph = build_split_filter([360, 720], trickplay=True)
+    assert graph.startswith("[0:v]split=3[v0][v1][vt]")
+    assert graph.endswith("tile=5x5[vtout]")
+
+
+def test_write_trickplay_vtt_maps_intervals_to_tiles(mocker, tmp_path,
+                                                     settings):
+    """Each interval points at its tile in the signed sprite sheet."""
+    from PIL import Image
+    settings.HLS_REQUEST_TIME_SIGNING = False
+    Image.new("RGB", (800, 450)).save(tmp_path / "a_sprite_001.jpg")
+    mocker.patch("video_flix_app.api.tasks.generate_presigned_url",
+                 return_value="https://signed/sprite")
+    vtt_path = write_trickplay_vtt(str(tmp_path), "a", 65)
+    lines = open(vtt_path).read().splitlines()
+    assert lines[0] == "WEBVTT"
+    assert "00:00:10.000 --> 00:00:20.000" in lines
+    assert "https://signed/sprite#xywh=160,0,160,90" in lines
+    assert lines[-1] == "https://signed/sprite#xywh=160,90,160,90"
+    assert format_vtt_timestamp(3725.5) == "01:02:05.500"
+
+
+def test_write_trickplay_vtt_keeps_file_names_for_request_time_signing(
+        tmp_path, settings):
+    """Sprite sheets are signed per request by the trickplay endpoint."""
+    from PIL import Image
+    settings.HLS_REQUEST_TIME_SIGNING = True
+    Image.new("RGB", (800, 450)).save(tmp_path / "a_sprite_001.jpg")
+    vtt_path = write_trickplay_vtt(str(tmp_path), "a", 65)
+    lines = open(vtt_path).read().splitlines()
+    assert lines[-1] == "a_sprite_001.jpg#xywh=160,90,160,90"
+
+
+def test_create_thumbnail_variants_resizes_without_upscaling(tmp_path):
+    """Each fitting width is written once per format, keeping aspect ratio."""
+    from PIL import Image
+    frame_path = tmp_path / "frame.jpg"
+    Image.new("RGB", (800, 450)).save(frame_path)
+    variants = create_thumbnail_variants(
+        str(frame_path), str(tmp_path), "a", [320, 640, 1280])
+    assert [(fmt, width) for fmt, width, _ in variants] == [
+        ("webp", 320), ("jpeg", 320), ("webp", 640), ("jpeg", 640)]
+    with Image.open(variants[0][2]) as image:
+        assert image.format == "WEBP"
+        assert image.size == (320, 180)
+
+
+def test_sign_ts_segment_urls_signs_fmp4_init_and_fragments(mocker, tmp_path):
+    """fMP4 playlists get their EXT-X-MAP URI and .m4s fragments signed."""
+    mocker.patch("video_flix_app.api.tasks.generate_presigned_url",
+                 side_effect=lambda key: f"signed/{key}")
+    playlist = tmp_path / "a_360p.m3u8"
+    playlist.write_text('#EXTM3U\n#EXT-X-MAP:URI="a_360p_init.mp4"\n'
+                        '#EXTINF:10.0,\na_360p_000.m4s\n')
+    tasks.sign_ts_segment_urls(str(playlist), "a")
+    assert playlist.read_text().splitlines()[1:] == [
+        '#EXT-X-MAP:URI="signed/hls/a/a_360p_init.mp4"',
+        "#EXTINF:10.0,",
+        "signed/hls/a/a_360p_000.m4s",
+    ]
+
+
+def test_single_file_playlist_is_signed_once_and_stitched(mocker, tmp_path):
+    """Byte-range playlists need one signature per file and keep their ranges."""
+    sign = mocker.patch("video_flix_app.api.tasks.generate_presigned_url",
+                        return_value="signed")
+    chunk = tmp_path / "a_chunk0000_360p.m3u8"
+    chunk.write_text("#EXTM3U\n#EXT-X-TARGETDURATION:10\n"
+                     "#EXTINF:10.0,\n#EXT-X-BYTERANGE:100@0\na_chunk0000_360p.ts\n"
+                     "#EXTINF:5.0,\n#EXT-X-BYTERANGE:50@100\na_chunk0000_360p.ts\n")
+    stitched = tmp_path / "a_360p.m3u8"
+    stitch_playlists([str(chunk)], str(stitched))
+    tasks.sign_ts_segment_urls(str(stitched), "a")
+    lines = stitched.read_text().splitlines()
+    assert "#EXT-X-VERSION:4" in lines
+    assert lines[-4:-1] == ["#EXTINF:5.0,", "#EXT-X-BYTERANGE:50@100", "signed"]
+    assert sign.call_count == 1
+
+
+def test_transcode_sequentially_skips_checkpointed_renditions(mocker, settings):
+    """A retried sequential transcode only encodes what is not checkpointed."""
+    settings.HLS_TRICKPLAY = False
+    checkpoints.mark_done("resume", "120p")
+    encode = mocker.patch("video_flix_app.api.tasks.encode_rendition")
+    encode_audio = mocker.patch("video_flix_app.api.tasks.encode_audio_rendition")
+    tasks.transcode_sequentially("source.mp4", None, "resume", [120, 360],
+                                 shared_audio=True)
+    assert [c.args[2] for c in encode.call_args_list] == [360]
+    encode_audio.assert_called_once()
+
+
+def test_encode_rendition_checkpoints_only_after_upload(mocker):
+    """A failed upload leaves the rendition unfinished for the retry."""
+    mocker.patch("video_flix_app.api.tasks.transcode_to_hls")
+    mocker.patch("video_flix_app.api.tasks.sign_all_variant_playlists")
+    upload = mocker.patch("video_flix_app.api.tasks.upload_hls_to_s3",
+                          side_effect=Exception("S3 down"))
+    with pytest.raises(Exception):
+        tasks.encode_rendition("source.mp4", "upload", 360)
+    assert not checkpoints.is_done("upload", "360p")
+    upload.side_effect = None
+    tasks.encode_rendition("source.mp4", "upload", 360)
+    assert checkpoints.is_done("upload", "360p")
+
+
+def test_single_pass_checkpoints_and_skips_uploaded_renditions(mocker,
+                                                              settings):
+    """A retried single pass does not encode what its upload already stored."""
+    settings.HLS_TRANSCODE_MODE = "single_pass"
+    settings.HLS_PROGRESSIVE = False
+    settings.HLS_TRICKPLAY = True
+    settings.HLS_SHARED_AUDIO = True
+    mocker.patch("video_flix_app.api.tasks.source_input")
+    mocker.patch("video_flix_app.api.tasks.plan_encoding_ladder",
+                 return_value=([120, 360], 1.0))
+    mocker.patch("video_flix_app.api.tasks.source_has_audio",
+                 return_value=True)
+    mocker.patch("video_flix_app.api.tasks.run_ffprobe", return_value={})
+    mocker.patch("video_flix_app.api.tasks.get_media_duration",
+                 return_value=10.0)
+    mocker.patch("video_flix_app.api.tasks.write_trickplay_vtt",
+                 return_value=None)
+    mocker.patch("video_flix_app.api.tasks.sign_all_variant_playlists")
+    upload = mocker.patch("video_flix_app.api.tasks.upload_hls_to_s3",
+                          side_effect=Exception("S3 down"))
+    transcode = mocker.patch("video_flix_app.api.tasks.transcode_all_heights")
+    trickplay = mocker.patch(
+        "video_flix_app.api.tasks.create_trickplay_with_ffmpeg")
+    finalize = mocker.patch("video_flix_app.api.tasks.finalize_hls")
+    with pytest.raises(Exception):
+        transcode_video_to_hls("videos/a.mp4", None, "pass")
+    assert not checkpoints.is_done("pass", "360p")
+    upload.side_effect = None
+    transcode_video_to_hls("videos/a.mp4", None, "pass")
+    for step in ["120p", "360p", tasks.AUDIO_RENDITION, tasks.TRICKPLAY_STEP]:
+        assert checkpoints.is_done("pass", step)
+    transcode.reset_mock()
+    transcode_video_to_hls("videos/a.mp4", None, "pass")
+    transcode.assert_not_called()
+    trickplay.assert_not_called()
+    assert finalize.call_count == 2
+
+
+def test_chunked_mode_encodes_shared_audio_once(mocker, settings):
+    """The shared audio is one whole-source job and is not stitched."""
+    settings.HLS_TRICKPLAY = False
+    settings.HLS_CHUNK_SECONDS = 10
+    mocker.patch("video_flix_app.api.tasks.probe_keyframe_times",
+                 return_value=[0.0, 10.0])
+    get_queue = mocker.patch("video_flix_app.api.tasks.django_rq.get_queue")
+    tasks.enqueue_chunked_transcode("in.mp4", "videos/a.mp4", 1, "a",
+                                    [360], duration=20.0, shared_audio=True)
+    calls = get_queue.return_value.enqueue.call_args_list
+    assert [c.args[0] for c in calls[:-1]] == [
+        tasks.transcode_audio_rendition, tasks.transcode_chunk,
+        tasks.transcode_chunk]
+    assert len(calls[-1].kwargs["depends_on"]) == 3
+    download = mocker.patch(
+        "video_flix_app.api.tasks.download_chunk_playlists", return_value=[])
+    mocker.patch("video_flix_app.api.tasks.stitch_playlists")
+    mocker.patch("video_flix_app.api.tasks.upload_hls_to_s3")
+    finalize = mocker.patch("video_flix_app.api.tasks.finalize_hls")
+    tasks.stitch_chunked_hls(1, "a", [360], 2, shared_audio=True)
+    assert [c.args[2] for c in download.call_args_list] == ["360p"]
+    finalize.assert_called_once_with(1, "a", [360], True)
+
+
+def test_transcode_chunk_skips_checkpointed_chunk(mocker):
+    """Chunks finished by an earlier attempt are not transcoded again."""
+    checkpoints.mark_done("chunked", tasks.get_chunk_name("chunked", 2))
+    source = mocker.patch("video_flix_app.api.tasks.source_input")
+    assert tasks.transcode_chunk("videos/a.mp4", "chunked", 2, 0.0, 10.0,
+                                 [360]) == 2
+    source.assert_not_called()
+
+
+def test_single_pass_writes_no_master_when_progressive(mocker, settings):
+    """The progressively published master is not overwritten by ffmpeg's."""
+    run = mocker.patch("video_flix_app.api.tasks.progress.run_ffmpeg")
+    settings.HLS_PROGRESSIVE = True
+    tasks.run_ffmpeg_hls_multi("in.mp4", "/tmp/out", "a", [360], True)
+    assert "-master_pl_name" not in run.call_args.args[0]
+    settings.HLS_PROGRESSIVE = False
+    tasks.run_ffmpeg_hls_multi("in.mp4", "/tmp/out", "a", [360], True)
+    assert "a_master.m3u8" in run.call_args.args[0]
+
+
+def test_order_for_publishing_starts_with_first_rendition(settings):
+    """The rendition closest to HLS_FIRST_RENDITION_HEIGHT is encoded first."""
+    settings.HLS_FIRST_RENDITION_HEIGHT = 360
+    assert tasks.order_for_publishing([120, 360, 720, 1080]) == [360, 120, 720, 1080]
+    assert tasks.order_for_publishing([720, 1080]) == [720, 1080]
+
+
+def test_publish_available_renditions_waits_for_audio(mocker, settings):
+    """Only finished renditions are published, and none before the shared audio."""
+    settings.HLS_PROGRESSIVE = True
+    publish = mocker.patch("video_flix_app.api.tasks.publish_master_playlist")
+    checkpoints.mark_done("early", "360p")
+    assert tasks.publish_available_renditions(
+        1, "early", [360, 720], shared_audio=True) == []
+    publish.assert_not_called()
+    checkpoints.mark_done("early", tasks.AUDIO_RENDITION)
+    assert tasks.publish_available_renditions(
+        1, "early", [360, 720], shared_audio=True) == [360]
+    publish.assert_called_once_with(1, "early", [360], True)
+
+
+@pytest.mark.django_db
+def test_pipeline_reuses_assets_of_identical_upload(mocker, settings):
+    """A re-upload of a processed file shares its assets and queues nothing."""
+    settings.VIDEO_DEDUPLICATION = True
+    mocker.patch("video_flix_app.api.tasks.export_model_to_s3")
+    mocker.patch("video_flix_app.api.tasks.get_source_version",
+                 return_value=("etag", 1000))
+    mocker.patch("video_flix_app.api.tasks.compute_content_hash",
+                 return_value="abc")
+    get_queue = mocker.patch("video_flix_app.api.tasks.django_rq.get_queue")
+    original = Video.objects.create(
+        title="First", content_hash="abc", duration=30, height=720,
+        file_size=1000,
+        hls_playlist="hls/first/first_master.m3u8",
+        thumbnail="thumbnails/first.jpg")
+    copy = Video.objects.create(title="Again")
+    tasks.process_video_pipeline("videos/again.mp4", copy.id)
+    copy.refresh_from_db()
+    assert copy.content_hash == "abc"
+    assert copy.hls_playlist == original.hls_playlist
+    assert (copy.thumbnail, copy.duration) == (original.thumbnail, 30)
+    get_queue.assert_not_called()
+
+
+@pytest.mark.django_db
+def test_pipeline_hashes_only_when_size_matches(mocker):
+    """Sources are hashed for comparison only when another has their size."""
+    mocker.patch("video_flix_app.api.tasks.get_source_version",
+                 return_value=("etag", 1000))
+    compute = mocker.patch("video_flix_app.api.tasks.compute_content_hash",
+                           return_value="abc")
+    other = Video.objects.create(title="Other", video_file="videos/old.mp4",
+                                 file_size=999)
+    video = Video.objects.create(title="New")
+    assert not tasks.reuse_duplicate_assets("videos/new.mp4", video.id)
+    compute.assert_not_called()
+    Video.objects.filter(id=other.id).update(file_size=1000)
+    tasks.reuse_duplicate_assets("videos/new.mp4", video.id)
+    assert [c.args[0] for c in compute.call_args_list] == [
+        "videos/new.mp4", "videos/old.mp4"]
+    other.refresh_from_db()
+    assert other.content_hash == "abc"
+
+
+@pytest.mark.django_db
+def test_local_source_hashes_fresh_download(mocker, settings, tmp_path):
+    """The source cache fill stores the hash; cache hits do not rehash."""
+    settings.VIDEO_DEDUPLICATION = True
+    settings.VIDEO_SOURCE_CACHE_DIR = str(tmp_path)
+    mocker.patch("video_flix_app.api.tasks.get_source_version",
+                 return_value=("etag", 4))
+
+    def download(s3_key, local_path):
+        with open(local_path, "wb") as f:
+            f.write(b"data")
+        return True
+
+    mocker.patch("video_flix_app.api.tasks.download_from_s3",
+                 side_effect=download)
+    video = Video.objects.create(title="Fill", video_file="videos/fill.mp4")
+    hash_file = mocker.spy(tasks, "hash_file")
+    for _ in range(2):
+        with tasks.local_source("videos/fill.mp4"):
+            pass
+    video.refresh_from_db()
+    assert video.content_hash == tasks.hash_chunks([b"data"])
+    hash_file.assert_called_once()
+
+
+@pytest.mark.django_db
+def test_delete_video_assets_keeps_shared_assets(mocker):
+    """Assets still referenced by a duplicate survive the deletion job."""
+    mocker.patch("video_flix_app.api.tasks.export_model_to_s3")
+    s3_client = mocker.patch("video_flix_app.api.tasks.get_s3_client").return_value
+    s3_client.delete_objects.return_value = {}
+    Video.objects.filter(id=Video.objects.create(title="Copy").id).update(
+        hls_playlist="hls/a/a_master.m3u8", thumbnail="thumbnails/a.jpg")
+    delete_video_assets_from_s3("hls/a/a_master.m3u8", "thumbnails/a.jpg",
+                                "videos/b.mp4", ["thumbnails/a_320w.webp"])
+    s3_client.list_objects_v2.assert_not_called()
+    s3_client.delete_objects.assert_called_once()
+    assert s3_client.delete_objects.call_args.kwargs["Delete"]["Objects"] == [
+        {"Key": "videos/b.mp4"}]
@@ -44,6 +44,7 @@ def mock_boto3_client():
         mock_client.download_file.return_value = True
         mock_client.upload_file.return_value = True
         mock_client.delete_object.return_value = True
+        mock_client.generate_presigned_url.return_value = "https://s3/signed"
         mock_get_s3_client.return_value = mock_client
         yield mock_get_s3_client
 
@@ -77,3 +78,35 @@ def test_delete_video_denied_for_normal_user(auth_client):
     url = f"{VIDEO_URL}{video.id}/"
     response = auth_client.delete(url)
     assert response.status_code == status.HTTP_403_FORBIDDEN
+
+
+@pytest.mark.django_db
+def test_video_progress_returns_cached_progress(auth_client):
+    """The progress endpoint returns the transcode progress per rendition."""
+    from video_flix_app.api import progress
+    video = Video.objects.create(title="Encoding", video_file="videos/enc.mp4")
+    url = f"{VIDEO_URL}{video.id}/progress/"
+    assert auth_client.get(url).status_code == status.HTTP_404_NOT_FOUND
+    progress.register("enc", ["360p"], duration=10)
+    progress.report("enc", ["360p"], {"status": "running", "percent": 40.0})
+    response = auth_client.get(url)
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data["renditions"]["360p"]["percent"] == 40.0
+
+
+@pytest.mark.django_db
+def test_video_playlist_points_variants_at_endpoint(auth_client, mocker):
+    """The master is rendered with variant URIs served by the API."""
+    video = Video.objects.create(title="Play", video_file="videos/play.mp4")
+    url = f"{VIDEO_URL}{video.id}/playlist/"
+    assert auth_client.get(url).status_code == status.HTTP_404_NOT_FOUND
+    Video.objects.filter(id=video.id).update(
+        hls_playlist="hls/play/play_master.m3u8")
+    mocker.patch("video_flix_app.api.playlists.load_template",
+                 return_value="#EXTM3U\n#EXT-X-STREAM-INF:BANDWIDTH=1\n"
+                              "play_360p.m3u8\n")
+    response = auth_client.get(url)
+    assert response.status_code == status.HTTP_200_OK
+    assert response["Content-Type"] == "application/vnd.apple.mpegurl"
+    assert response.content.decode().splitlines()[2] == \
+        f"{url}play_360p.m3u8/"